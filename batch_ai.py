@@ -0,0 +1,223 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from settings import *
+from tile_grid import DOOR
+
+STATES = ('sleep', 'patrol', 'hunt', 'chase')
+SLEEP, PATROL, HUNT, CHASE = range(len(STATES))
+STATE_IDS = {name: i for i, name in enumerate(STATES)}
+STEPS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+class BatchAI:
+    def __init__(self, game):
+        self.game = game
+        self.fields = {}
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    def run_turn(self, act):
+        game = self.game
+        grid, player, scheduler = game.map_data, game.player, game.scheduler
+        enemies = game.enemies
+        n, w, h = len(enemies), grid.width, grid.height
+        rows = np.array([(e.x, e.y, e.vision_radius, STATE_IDS[e.state], e.ready_at, e.move_delay, e.attack_delay)
+                         for e in enemies], np.int64).reshape(n, 7)
+        x, y, vision, state, ready, move_delay, attack_delay = rows.T.copy()
+        px, py = player.x, player.y
+        goal = np.fromiter((p[1] * w + p[0] if p else -1 for p in (e.last_seen_pos for e in enemies)), np.int64, n)
+
+        visible = np.frombuffer(grid.visible, np.uint8)
+        aware = (visible[y * w + x] != 0) & ((x - px)**2 + (y - py)**2 <= vision * vision)
+        game.aware_enemies = dict.fromkeys(enemies[i] for i in np.flatnonzero(aware))
+        for i in np.flatnonzero(aware & (state == SLEEP)):
+            game.log.add(f"{enemies[i].name} прокинувся!")
+        for i in np.flatnonzero(aware):
+            e = enemies[i]
+            e.state = 'chase'
+            e.last_seen_pos = (px, py)
+            if e.path and e.path[-1] != (px, py):
+                e.path = []
+        for i in np.flatnonzero(~aware & (state == CHASE)):
+            e = enemies[i]
+            e.state = 'hunt'
+            game.add_floating_text("?", e.x, e.y, COLORS['YELLOW'])
+        state[aware] = CHASE
+        state[~aware & (state == CHASE)] = HUNT
+        goal[aware] = py * w + px
+        path_goal = np.fromiter((e.path[-1][1] * w + e.path[-1][0] if e.path else -1 for e in enemies), np.int64, n)
+        fields = {}
+
+        end = scheduler.now + scheduler.ticks
+        ready = np.maximum(ready, scheduler.now)
+        active = state != SLEEP
+        blocked = np.zeros(w * h, bool)
+        for bx, by in game.occupancy.blocked:
+            blocked[by * w + bx] = True
+        blocked[py * w + px] = True
+        while True:
+            pending = active & (ready < end)
+            if not pending.any(): break
+            t = ready[pending].min()
+            acting = np.flatnonzero(pending & (ready == t))
+            scheduler.now = int(t)
+            chasing = acting[state[acting] == CHASE]
+            hunting = acting[(state[acting] == HUNT) & (goal[acting] >= 0)]
+            adjacent = chasing[(x[chasing] - px)**2 + (y[chasing] - py)**2 <= 2]
+            for i in adjacent:
+                enemies[i].attack(player)
+            ready[adjacent] += attack_delay[adjacent]
+
+            walkers = np.concatenate((chasing[(x[chasing] - px)**2 + (y[chasing] - py)**2 > 2], hunting))
+            walkers = walkers[path_goal[walkers] != goal[walkers]]
+            targets = [int(target) for target in np.unique(goal[walkers])]
+            known = [target for target in targets if self._field(target, fields) is not None]
+            walkers = walkers[np.isin(goal[walkers], known)]
+            movers, stuck = self._step_downhill(walkers, goal, x, y, fields, blocked)
+            waiting = self._cut_off(stuck, goal, x, y, blocked)
+            for i in waiting:
+                e = enemies[i]
+                e.path, e.stuck_counter, e.patrol_target = [], 0, None
+            movers = np.concatenate((movers, waiting))
+            ready[movers] += move_delay[movers]
+            path_goal[movers] = -1
+
+            rest = np.setdiff1d(acting, np.concatenate((adjacent, movers)), assume_unique=True)
+            for i in rest:
+                e = enemies[i]
+                blocked[e.y * w + e.x] = False
+                delay = act(e)
+                blocked[e.y * w + e.x] = True
+                x[i], y[i] = e.x, e.y
+                state[i] = STATE_IDS[e.state]
+                goal[i] = e.last_seen_pos[1] * w + e.last_seen_pos[0] if e.last_seen_pos else -1
+                path_goal[i] = e.path[-1][1] * w + e.path[-1][0] if e.path else -1
+                if delay is None:
+                    active[i] = False
+                else:
+                    ready[i] = t + delay
+        for i in np.flatnonzero(active):
+            enemies[i].ready_at = int(ready[i])
+        scheduler.reset(enemies, end)
+        self.fields = {target: field for target, field in self.fields.items() if target in fields}
+
+    def _field(self, target, used):
+        if target in used:
+            return used[target]
+        grid = self.game.map_data
+        if len(used) >= AI['BATCH_FIELDS']:
+            return None
+        key = (grid, grid.passable_version)
+        field = self.fields.get(target)
+        if field is None or field[0] != key:
+            field = self.fields[target] = (key,) + self._flood(target)
+        used[target] = field
+        return field
+
+    def _cut_off(self, stuck, goal, x, y, blocked):
+        grid = self.game.map_data
+        w = grid.width
+        free = np.frombuffer(grid.passable, np.uint8) != 0
+        free &= ~blocked
+        boxed = np.ones(len(stuck), bool)
+        for dx, dy in STEPS:
+            nx, ny = x[stuck] + dx, y[stuck] + dy
+            inside = (nx >= 0) & (nx < w) & (ny >= 0) & (ny < grid.height)
+            boxed &= ~(inside & free[np.where(inside, ny * w + nx, 0)])
+        waiting = [stuck[boxed]]
+        stuck = stuck[~boxed]
+        for target in np.unique(goal[stuck]):
+            group = stuck[goal[stuck] == target]
+            x0, y0, route = self._flood(int(target), blocked)
+            size = route.shape[0]
+            reachable = np.zeros(len(group), bool)
+            for dx, dy in STEPS:
+                lx, ly = x[group] + dx - x0, y[group] + dy - y0
+                ok = (lx >= 0) & (lx < size) & (ly >= 0) & (ly < size)
+                reachable |= ok & (route[np.where(ok, ly, 0), np.where(ok, lx, 0)] >= 0)
+            waiting.append(group[~reachable])
+        return np.sort(np.concatenate(waiting))
+
+    def _flood(self, target, blocked=None):
+        grid = self.game.map_data
+        w, h = grid.width, grid.height
+        r = AI['FLOW_FIELD_RADIUS']
+        tx, ty = target % w, target // w
+        x0, y0 = tx - r, ty - r
+        cx0, cy0, cx1, cy1 = max(x0, 0), max(y0, 0), min(tx + r + 1, w), min(ty + r + 1, h)
+        grid.ensure(cx0, cy0, cx1, cy1)
+        size = 2 * r + 1
+        passable = np.zeros((size, size), bool)
+        passable[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0] = np.frombuffer(grid.passable, np.uint8).reshape(h, w)[cy0:cy1, cx0:cx1] != 0
+        if blocked is not None:
+            passable[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0] &= ~blocked.reshape(h, w)[cy0:cy1, cx0:cx1]
+        dist = np.full((size, size), -1, np.int32)
+        dist[r, r] = 0
+        passable[r, r] = False
+        frontier = np.zeros((size, size), bool)
+        frontier[r, r] = True
+        for d in range(1, r + 1):
+            grown = np.zeros((size, size), bool)
+            grown[1:] |= frontier[:-1]
+            grown[:-1] |= frontier[1:]
+            grown[:, 1:] |= frontier[:, :-1]
+            grown[:, :-1] |= frontier[:, 1:]
+            grown &= passable
+            if not grown.any(): break
+            dist[grown] = d
+            passable &= ~grown
+            frontier = grown
+        return x0, y0, dist
+
+    def _step_downhill(self, walkers, goal, x, y, fields, blocked):
+        game = self.game
+        grid, enemies = game.map_data, game.enemies
+        w = grid.width
+        player_i = game.player.y * w + game.player.x
+        if not len(walkers):
+            return walkers, walkers
+        walkers = np.sort(walkers)
+        targets = sorted(fields)
+        slot = np.searchsorted(targets, goal[walkers])
+        stack = np.stack([fields[t][3] for t in targets])
+        ox = np.array([fields[t][1] for t in targets])[slot]
+        oy = np.array([fields[t][2] for t in targets])[slot]
+        size = stack.shape[1]
+        mx, my = x[walkers], y[walkers]
+
+        def lookup(xs, ys):
+            lx, ly = xs - ox, ys - oy
+            ok = (lx >= 0) & (lx < size) & (ly >= 0) & (ly < size)
+            return np.where(ok, stack[slot, np.where(ok, ly, 0), np.where(ok, lx, 0)], -1)
+
+        here = lookup(mx, my)
+        keep = here > np.where(goal[walkers] == player_i, 1, 0)
+        movers, slot, ox, oy, mx, my, best = walkers[keep], slot[keep], ox[keep], oy[keep], mx[keep], my[keep], here[keep]
+        target = np.full(len(movers), -1, np.int64)
+        for dx, dy in STEPS:
+            nx, ny = mx + dx, my + dy
+            d = lookup(nx, ny)
+            ni = ny * w + nx
+            better = (d >= 0) & (d < best) & ~blocked[np.where(d >= 0, ni, 0)]
+            best = np.where(better, d, best)
+            target = np.where(better, ni, target)
+        moving = np.flatnonzero(target >= 0)
+        _, first = np.unique(target[moving], return_index=True)
+        moved = np.sort(moving[first])
+        for k in moved:
+            i, ti = movers[k], int(target[k])
+            e = enemies[i]
+            e.path = []
+            tx, ty = ti % w, ti // w
+            if grid.types[ti] == DOOR and not grid.is_open[ti]:
+                e._try_move(tx - e.x, ty - e.y)
+                continue
+            blocked[e.y * w + e.x] = False
+            blocked[ti] = True
+            game.occupancy.move('enemy', e, tx, ty)
+            e.stuck_counter = 0
+            x[i], y[i] = tx, ty
+        return movers[moved], np.setdiff1d(movers, movers[moved])
@@ -0,0 +1,67 @@
+import argparse, json, os, platform, sys
+from benchmarks.suite import BENCHMARKS, SEED
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, res in sorted(results.items()):
+        base = baseline.get('results', {}).get(key)
+        if not base:
+            print(f"{key:28} {res['median_ms']:10.3f} ms   (new)")
+            continue
+        ratio = res['median_ms'] / base['median_ms'] if base['median_ms'] else 1.0
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        print(f"{key:28} {res['median_ms']:10.3f} ms   x{ratio:5.2f} vs {base['median_ms']:.3f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the game's hot paths with fixed seeds")
+    parser.add_argument('--only', nargs='*', choices=sorted(BENCHMARKS), help='benchmark groups to run')
+    parser.add_argument('--quick', action='store_true', help='fewer sizes and repeats')
+    parser.add_argument('--output', help='write JSON results to this file (default: stdout)')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.15, help='allowed slowdown before flagging')
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"[bench] {name}...", file=sys.stderr)
+        results.update(BENCHMARKS[name](args.quick))
+    report = {'seed': SEED, 'quick': args.quick, 'python': platform.python_version(), 'results': results}
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    if args.save_baseline:
+        if args.only and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            if baseline.get('quick') == args.quick:
+                report['results'] = dict(baseline.get('results', {}), **results)
+                text = json.dumps(report, indent=2, sort_keys=True)
+        with open(args.baseline, 'w') as f:
+            f.write(text)
+        print(f"[bench] baseline saved to {args.baseline}", file=sys.stderr)
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('quick', False) != args.quick:
+            mode = 'quick' if baseline.get('quick') else 'full'
+            print(f"[bench] {args.baseline} was recorded in {mode} mode; rerun in that mode to compare", file=sys.stderr)
+            if not args.output:
+                print(text)
+            return
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+    elif not args.output:
+        print(text)
+
+if __name__ == "__main__":
+    main()
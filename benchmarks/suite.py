@@ -0,0 +1,163 @@
+import contextlib, io, math, os, statistics, time
+from collections import deque
+from settings import *
+from rng import LevelRng
+from map_generator import MapGenerator
+from utils import FOV_ENGINES, PatrolIndex, get_path
+
+SEED = 1234
+
+def timed(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def summarize(samples):
+    return {'median_ms': statistics.median(samples) * 1000, 'min_ms': min(samples) * 1000, 'runs': len(samples)}
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+def generate(level, size=None, seed=SEED):
+    return quiet(MapGenerator(level, LevelRng(seed, level), size).generate)
+
+def bench_mapgen(quick):
+    results = {}
+    sizes = [40, 80] if quick else [40, 80, 160]
+    for kind, level in (('loop', 1), ('maze', LEVELS_PER_BIOME)):
+        for size in sizes:
+            results[f'mapgen.{kind}.{size}'] = timed(lambda: generate(level, (size, size)), 3 if quick else 5)
+    return results
+
+def bench_fov(quick):
+    results = {}
+    grid = generate(1, (80, 80))[0]
+    origins = LevelRng(SEED, 0).layout.sample(grid.cells_of('floor'), 20)
+    for name, engine in FOV_ENGINES.items():
+        for radius in (5, 10, 20):
+            def run():
+                for x, y in origins:
+                    engine(x, y, radius, grid)
+            results[f'fov.{name}.r{radius}'] = timed(run, 5 if quick else 20)
+    return results
+
+def _pairs_by_distance(grid, start, distances):
+    w = grid.width
+    dist = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if (nx, ny) in grid and (nx, ny) not in dist and grid.passable[ny * w + nx]:
+                dist[(nx, ny)] = dist[(x, y)] + 1
+                queue.append((nx, ny))
+    found = {}
+    for pos, d in dist.items():
+        for target in distances:
+            if target not in found and d == target:
+                found[target] = pos
+    return found
+
+def bench_pathfinding(quick):
+    results = {}
+    grid, start = generate(1, (120, 120))[:2]
+    for d, goal in sorted(_pairs_by_distance(grid, start, (10, 25, 50, 100, 200)).items()):
+        results[f'path.d{d}'] = timed(lambda: get_path(start, goal, grid), 5 if quick else 20)
+    return results
+
+def _populated_game(count, state='patrol'):
+    from main import Game
+    from entities import Enemy
+    game = quiet(Game, headless=True, seed=SEED)
+    floors = game.map_data.cells_of('floor')
+    picks = LevelRng(SEED, count).population.sample(floors, min(count, len(floors)))
+    for x, y in picks:
+        enemy = Enemy(x, y, game.current_level, game, force_type='skeleton')
+        enemy.state = state
+        game.add_enemy(enemy)
+    game.player.hp = game.player.max_hp = 10**9
+    game.update_fov()
+    return game
+
+def _horde_game(count, size=64):
+    from main import Game
+    from entities import Enemy
+    from tile_grid import TileGrid
+    game = quiet(Game, headless=True, seed=SEED)
+    grid = TileGrid(size, size)
+    for x, y in grid:
+        grid.set_tile(x, y, 'floor' if 0 < x < size - 1 and 0 < y < size - 1 else 'wall')
+    game.map_data = grid
+    game.patrol_index = PatrolIndex(grid, [])
+    game.enemies, game.items, game.chests, game.rooms = [], [], [], []
+    game.occupancy.rebuild([], [], [])
+    game.scheduler.reset([])
+    c = size // 2
+    game.player.x = game.player.y = c
+    r = AI['FLOW_FIELD_RADIUS'] - 2
+    cells = [(x, y) for x, y in grid if 0 < abs(x - c) + abs(y - c) <= r and grid.passable[grid.index(x, y)]]
+    for x, y in LevelRng(SEED, count).population.sample(cells, min(count, len(cells))):
+        enemy = Enemy(x, y, game.current_level, game, force_type='rat')
+        enemy.state = 'hunt'
+        enemy.last_seen_pos = (c, c)
+        game.add_enemy(enemy)
+    game.player.hp = game.player.max_hp = 10**9
+    game.update_fov()
+    return game
+
+def bench_enemy_turns(quick):
+    results = {}
+    for count in ((10, 50) if quick else (10, 50, 200)):
+        results[f'ai.turn.{count}'] = timed(lambda game: quiet(game.process_enemy_turns), 10 if quick else 30,
+                                            setup=lambda: _populated_game(count))
+    results['ai.horde.1000'] = timed(lambda game: quiet(game.process_enemy_turns), 5 if quick else 15,
+                                     setup=lambda: _horde_game(1000))
+    samples = []
+    for _ in range(2 if quick else 5):
+        samples += _walk_horde(_horde_game(1000), 20 if quick else 40)
+    results['ai.horde.moving.1000'] = summarize(samples)
+    return results
+
+def _walk_horde(game, turns, radius=12):
+    c = game.player.x
+    ring = list(dict.fromkeys((c + round(radius * math.cos(math.radians(a))), c + round(radius * math.sin(math.radians(a))))
+                              for a in range(360)))
+    samples, k = [], 0
+    for _ in range(turns):
+        for step in range(1, len(ring)):
+            x, y = ring[(k + step) % len(ring)]
+            if not game.get_enemy_at(x, y):
+                k = (k + step) % len(ring)
+                game.player.x, game.player.y = x, y
+                break
+        game.update_fov()
+        start = time.perf_counter()
+        quiet(game.process_enemy_turns)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def bench_draw(quick):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from main import Game
+    results = {}
+    game = quiet(Game, seed=SEED)
+    game.levels.shutdown()
+    for zoom in (0.5, 1.0, 2.0):
+        game.camera.zoom = zoom
+        game.camera.center_on(game.player.x, game.player.y)
+        game.draw()
+        results[f'draw.zoom{zoom}'] = timed(game.draw, 10 if quick else 60)
+    return results
+
+BENCHMARKS = {
+    'mapgen': bench_mapgen,
+    'fov': bench_fov,
+    'pathfinding': bench_pathfinding,
+    'ai': bench_enemy_turns,
+    'draw': bench_draw,
+}
@@ -1,7 +1,4 @@
-import pygame
-import random
 from settings import *
-from utils import get_path, has_line_of_sight
 
 class Entity:
     def __init__(self, x, y, name, game):
@@ -20,29 +17,24 @@ class Item(Entity):
         self.type = self.data['type']
         self.color_tint = color
 
-    def draw(self, screen, camera, assets):
+    def to_record(self):
+        return (self.x, self.y, self.name, self.color_tint)
+
+    @classmethod
+    def from_record(cls, record, game):
+        x, y, name, color = record
+        return cls(x, y, name, game, color)
+
+    def sprite(self, sprites, size):
         sprite_key = 'loot_potion'
         if self.type == 'weapon': sprite_key = 'loot_weapon'
         elif self.type == 'armor': sprite_key = 'loot_armor'
         elif self.type == 'key': sprite_key = 'key'
-        img = assets[sprite_key].copy()
+        elif self.type == 'artifact': sprite_key = 'artifact'
+        tint = None
         if self.color_tint:
-            colors = {
-                'key_0': (205, 127, 50),
-                'key_1': (192, 192, 192),
-                'key_2': (255, 215, 0),
-                'key_3': (0, 255, 255),
-                'key_4': (255, 0, 255)
-            }
-            rgb = colors.get(self.color_tint, COLORS['WHITE'])
-            colored_surface = pygame.Surface(img.get_size()).convert_alpha()
-            colored_surface.fill(rgb)
-            img.blit(colored_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-        rect = pygame.Rect(self.x * TILE_SIZE, self.y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-        screen_rect = camera.apply_rect(rect)
-        if screen_rect.width > 0:
-            scaled_img = pygame.transform.scale(img, (int(screen_rect.width), int(screen_rect.height)))
-            screen.blit(scaled_img, screen_rect)
+            tint = KEY_COLORS.get(self.color_tint, COLORS['WHITE'])
+        return sprites.get(sprite_key, size, tint)
 
 class Player(Entity):
     def __init__(self, x, y, game):
@@ -54,6 +46,20 @@ class Player(Entity):
         self.inventory = []
         self.equipment = {'weapon': None, 'armor': None}
 
+    def to_record(self):
+        return (self.x, self.y, self.hp, self.max_hp, self.base_damage, self.base_defense,
+                tuple(self.inventory), dict(self.equipment))
+
+    @classmethod
+    def from_record(cls, record, game):
+        x, y, hp, max_hp, base_damage, base_defense, inventory, equipment = record
+        player = cls(x, y, game)
+        player.hp, player.max_hp = hp, max_hp
+        player.base_damage, player.base_defense = base_damage, base_defense
+        player.inventory = list(inventory)
+        player.equipment = dict(equipment)
+        return player
+
     @property
     def damage_range(self):
         bonus = ITEMS_DB[self.equipment['weapon']]['val'] if self.equipment['weapon'] else 0
@@ -67,7 +73,7 @@ class Player(Entity):
 
     def roll_damage(self):
         min_d, max_d = self.damage_range
-        return random.randint(min_d, max_d)
+        return self.game.level_rng.combat.randint(min_d, max_d)
 
     @property
     def is_dead(self):
@@ -119,11 +125,10 @@ class Player(Entity):
                     self.attack(enemy)
                     return True
                 self.x, self.y = target_x, target_y
-                for item in self.game.items[:]:
-                    if item.x == self.x and item.y == self.y:
-                        self.game.log.add(f"Підібрано: {item.name}")
-                        self.inventory.append(item.name)
-                        self.game.items.remove(item)
+                for item in self.game.get_items_at(self.x, self.y):
+                    self.game.log.add(f"Підібрано: {item.name}")
+                    self.inventory.append(item.name)
+                    self.game.remove_item(item)
                 return True
         return False
 
@@ -132,6 +137,7 @@ class Player(Entity):
         actual_dmg = max(1, dmg - target.defense)
         target.take_damage(actual_dmg)
         self.game.add_floating_text(f"-{actual_dmg}", target.x, target.y, COLORS['WHITE'])
+        self.game.make_noise(target.x, target.y, AI['NOISE_RADIUS'])
 
     def wait(self):
         self.game.log.add("Ви чекаєте...")
@@ -158,7 +164,7 @@ class Player(Entity):
         if 0 <= index < len(self.inventory):
             item_name = self.inventory.pop(index)
             dropped_item = Item(self.x, self.y, item_name, self.game)
-            self.game.items.append(dropped_item)
+            self.game.add_item(dropped_item)
             self.game.log.add(f"Ви викинули: {item_name}")
             return True
         return False
@@ -167,21 +173,35 @@ class Chest(Entity):
     def __init__(self, x, y, game):
         super().__init__(x, y, "Скриня", game)
         self.is_open = False
-        self.is_mimic = random.random() < GAME_BALANCE['MIMIC_CHANCE']
+        self.is_mimic = game.level_rng.population.random() < GAME_BALANCE['MIMIC_CHANCE']
+
+    def to_record(self):
+        return (self.x, self.y, self.is_open, self.is_mimic)
+
+    @classmethod
+    def from_record(cls, record, game):
+        x, y, is_open, is_mimic = record
+        chest = cls.__new__(cls)
+        Entity.__init__(chest, x, y, "Скриня", game)
+        chest.is_open = is_open
+        chest.is_mimic = is_mimic
+        return chest
 
     def interact(self):
         if self.is_open: return False
         if self.is_mimic:
             self.game.log.add("Це пастка! Скриня оживає!")
-            if self in self.game.chests: self.game.chests.remove(self)
+            self.game.remove_chest(self)
             mimic = Enemy(self.x, self.y, self.game.current_level, self.game, force_type='mimic')
-            self.game.enemies.append(mimic)
+            self.game.add_enemy(mimic)
             return True
-        self.is_open = True
+        self.game.occupancy.open_chest(self)
+        self.game.map_data.bump_region(self.x, self.y)
         tier = min(3, 1 + self.game.current_level // 3)
-        for _ in range(random.randint(1, 2)):
-            item_name = random.choice(LOOT_TABLE[tier])
-            self.game.items.append(Item(self.x, self.y, item_name, self.game))
+        loot_rng = self.game.level_rng.combat
+        for _ in range(loot_rng.randint(1, 2)):
+            item_name = loot_rng.choice(LOOT_TABLE[tier])
+            self.game.add_item(Item(self.x, self.y, item_name, self.game))
         self.game.log.add("Скриня відкрита.")
         return True
 
@@ -194,23 +214,17 @@ class Enemy(Entity):
             for min_lvl, enemies_list in ENEMY_SPAWN_RULES:
                 if level >= min_lvl: available_types = enemies_list
                 else: break
-            enemy_type_id = random.choice(available_types)
-        stats = ENEMIES_DB[enemy_type_id]
+            enemy_type_id = game.level_rng.population.choice(available_types)
         self.type_id = enemy_type_id
-        super().__init__(x, y, stats['name'], game)
-        self.sprite_key = stats['sprite']
+        stats = self._init_type(x, y, game)
         hp_mult = 1.0 + (level * 0.2)
         dmg_mult = 1.0 + (level * 0.1)
         self.max_hp = int(stats['base_hp'] * hp_mult)
         self.hp = self.max_hp
         self.base_damage = int(stats['base_dmg'] * dmg_mult)
         self.defense = level // 3
-        self.moves_per_turn = stats['moves']
-        self.attacks_per_turn = stats['attacks']
-        self.vision_radius = stats['vision']
-        self.move_energy = 0.0
-        self.attack_energy = 0.0
-        if random.random() < stats['patrol_chance']:
+        self.ready_at = 0
+        if game.level_rng.population.random() < stats['patrol_chance']:
             self.state = 'patrol'
         else:
             self.state = 'sleep'
@@ -219,13 +233,35 @@ class Enemy(Entity):
         self.patrol_target = None
         self.stuck_counter = 0
 
+    def _init_type(self, x, y, game):
+        stats = ENEMIES_DB[self.type_id]
+        super().__init__(x, y, stats['name'], game)
+        self.sprite_key = stats['sprite']
+        self.moves_per_turn = stats['moves']
+        self.attacks_per_turn = stats['attacks']
+        self.vision_radius = stats['vision']
+        self.move_delay = AI['TURN_TICKS'] // self.moves_per_turn
+        self.attack_delay = AI['TURN_TICKS'] // self.attacks_per_turn
+        return stats
+
+    def to_record(self):
+        return (self.type_id, self.x, self.y, self.hp, self.max_hp, self.base_damage, self.defense,
+                self.state, self.ready_at, self.last_seen_pos,
+                tuple(self.path), self.patrol_target, self.stuck_counter)
+
+    @classmethod
+    def from_record(cls, record, game):
+        enemy = cls.__new__(cls)
+        (enemy.type_id, x, y, enemy.hp, enemy.max_hp, enemy.base_damage, enemy.defense,
+         enemy.state, enemy.ready_at, enemy.last_seen_pos,
+         path, enemy.patrol_target, enemy.stuck_counter) = record
+        enemy._init_type(x, y, game)
+        enemy.path = list(path)
+        return enemy
+
     def take_turn(self):
         player = self.game.player
-        dist = ((self.x - player.x)**2 + (self.y - player.y)**2)**0.5
-        can_see = False
-        if dist <= self.vision_radius:
-            if has_line_of_sight(self.x, self.y, player.x, player.y, self.game.map_data):
-                can_see = True
+        can_see = self in self.game.aware_enemies
         if can_see:
             if self.state == 'sleep':
                 self.game.log.add(f"{self.name} прокинувся!")
@@ -237,30 +273,23 @@ class Enemy(Entity):
             self.state = 'hunt'
             self.game.add_floating_text("?", self.x, self.y, COLORS['YELLOW'])
         if self.state == 'sleep':
-            return
-        self.move_energy += self.moves_per_turn
-        self.attack_energy += self.attacks_per_turn
+            return None
         if self.state == 'chase':
+            dist = ((self.x - player.x)**2 + (self.y - player.y)**2)**0.5
             if dist < 1.5:
-                while self.attack_energy >= 1.0:
-                    self.attack(player)
-                    self.attack_energy -= 1.0
-                self.move_energy = 0
-            else:
-                while self.move_energy >= 1.0:
-                    self._move_via_path((player.x, player.y))
-                    self.move_energy -= 1.0
-                    new_dist = ((self.x - player.x)**2 + (self.y - player.y)**2)**0.5
-                    if new_dist < 1.5:
-                        break
+                self.attack(player)
+                return self.attack_delay
+            self._move_via_path((player.x, player.y))
         elif self.state == 'hunt':
-            while self.move_energy >= 1.0:
-                self._hunt_logic()
-                self.move_energy -= 1.0
+            self._hunt_logic()
         elif self.state == 'patrol':
-            while self.move_energy >= 1.0:
-                self._patrol_logic()
-                self.move_energy -= 1.0
+            self._patrol_logic()
+        return None if self.state == 'sleep' else self.move_delay
+
+    def alert(self, state, pos):
+        self.state = state
+        self.last_seen_pos = pos
+        self.game.scheduler.wake(self)
 
     def _hunt_logic(self):
         if not self.last_seen_pos:
@@ -277,27 +306,21 @@ class Enemy(Entity):
         if not self.patrol_target or (self.x, self.y) == self.patrol_target:
             self.path = []
             self.patrol_target = None
-            targets = []
-            if hasattr(self.game, 'rooms') and self.game.rooms:
-                valid_rooms = [r for r in self.game.rooms if r.type != 'start']
-                if valid_rooms:
-                    targets = [r.center for r in valid_rooms]
+            index = self.game.patrol_index
+            targets = list(index.room_centers)
             if not targets:
-                floors = [pos for pos, tile in self.game.map_data.items() if tile.type == 'floor']
+                floors = index.floor_cells()
                 if floors:
-                    targets = random.sample(floors, min(len(floors), 10))
+                    targets = self.game.level_rng.ai.sample(floors, min(len(floors), 10))
             if targets:
-                random.shuffle(targets)
-                obstacles = set()
-                for e in self.game.enemies:
-                    if e != self: obstacles.add((e.x, e.y))
-                for c in self.game.chests:
-                    if not c.is_open: obstacles.add((c.x, c.y))
+                self.game.level_rng.ai.shuffle(targets)
+                obstacles = self.game.occupancy.blocked
                 for t in targets:
+                    if not index.connected((self.x, self.y), t): continue
                     if self.game.get_enemy_at(t[0], t[1]): continue
                     chest = self.game.get_chest_at(t[0], t[1])
                     if chest and not chest.is_open: continue
-                    test_path = get_path((self.x, self.y), t, self.game.map_data, obstacles)
+                    test_path = self.game.find_path((self.x, self.y), t, obstacles, ignore=(self.x, self.y))
                     if test_path:
                         self.patrol_target = t
                         self.path = test_path
@@ -309,15 +332,13 @@ class Enemy(Entity):
             self._move_via_path(self.patrol_target)
 
     def _move_via_path(self, target_pos):
-        if not self.path or self.path[-1] != target_pos:
-            obstacles = set()
-            for e in self.game.enemies:
-                if e != self:
-                    obstacles.add((e.x, e.y))
-            for c in self.game.chests:
-                if not c.is_open:
-                    obstacles.add((c.x, c.y))
-            self.path = get_path((self.x, self.y), target_pos, self.game.map_data, obstacles)
+        player = self.game.player
+        detour = self.path and self.path[-1] == target_pos
+        if target_pos == (player.x, player.y) and not detour and self._step_downhill():
+            return
+        if not detour:
+            obstacles = self.game.occupancy.blocked
+            self.path = self.game.find_path((self.x, self.y), target_pos, obstacles, ignore=(self.x, self.y))
             self.stuck_counter = 0
             if not self.path and (self.x, self.y) != target_pos:
                 self.patrol_target = None
@@ -348,6 +369,25 @@ class Enemy(Entity):
             else:
                 self.path = []
 
+    def _step_downhill(self):
+        steps = self.game.player_field().downhill(self.x, self.y)
+        if steps is None:
+            return False
+        self.path = []
+        player = self.game.player
+        for nx, ny in steps:
+            if (nx, ny) == (player.x, player.y):
+                self.state = 'chase'
+                self.attack(player)
+                return True
+            if self.game.get_enemy_at(nx, ny): continue
+            chest = self.game.get_chest_at(nx, ny)
+            if chest and not chest.is_open: continue
+            if self._try_move(nx - self.x, ny - self.y):
+                self.stuck_counter = 0
+                return True
+        return False
+
     def _try_move(self, dx, dy):
         tx, ty = self.x + dx, self.y + dy
         if (tx, ty) not in self.game.map_data:
@@ -362,13 +402,12 @@ class Enemy(Entity):
             else:
                 return False
         if not self.game.is_blocked(tx, ty):
-            self.x = tx
-            self.y = ty
+            self.game.occupancy.move('enemy', self, tx, ty)
             return True
         return False
 
     def attack(self, target):
-        dmg = random.randint(int(self.base_damage * 0.8), int(self.base_damage * 1.2))
+        dmg = self.game.level_rng.combat.randint(int(self.base_damage * 0.8), int(self.base_damage * 1.2))
         actual = max(0, dmg - target.defense)
         target.take_damage(actual)
         self.game.log.add(f"{self.name} б'є вас на {actual}!")
@@ -376,15 +415,14 @@ class Enemy(Entity):
     def take_damage(self, amount):
         self.hp -= amount
         if self.state == 'sleep':
-            self.state = 'chase'
-            self.last_seen_pos = (self.game.player.x, self.game.player.y)
+            self.alert('chase', (self.game.player.x, self.game.player.y))
         if self.hp <= 0:
             self.game.log.add(f"{self.name} вмирає.")
-            if self in self.game.enemies:
-                self.game.enemies.remove(self)
+            self.game.remove_enemy(self)
             is_mimic = (self.type_id == 'mimic')
-            if is_mimic or random.random() < 0.3:
+            loot_rng = self.game.level_rng.combat
+            if is_mimic or loot_rng.random() < 0.3:
                 base_tier = min(3, 1 + self.game.current_level // 3)
                 final_tier = min(3, base_tier + 1) if is_mimic else base_tier
-                item_name = random.choice(LOOT_TABLE[final_tier])
-                self.game.items.append(Item(self.x, self.y, item_name, self.game))
\ No newline at end of file
+                item_name = loot_rng.choice(LOOT_TABLE[final_tier])
+                self.game.add_item(Item(self.x, self.y, item_name, self.game))
\ No newline at end of file
@@ -0,0 +1,46 @@
+import pygame
+from settings import *
+from profiler import profiler
+
+FOG_ALPHA = bytes([0, COLORS['FOG_ALPHA']]) + bytes(254)
+
+class FogLayer:
+    def __init__(self):
+        self.grid = None
+        self.pixels = None
+        self.mask = None
+        self.version = 0
+        self.cached = None
+        self.cached_state = None
+
+    def sync(self, grid):
+        if grid is not self.grid:
+            self.grid = grid
+            self.pixels = bytearray(len(grid) * 4)
+            explored = int.from_bytes(grid.explored, 'little')
+            visible = int.from_bytes(grid.visible, 'little')
+            self.pixels[3::4] = (explored & ~visible).to_bytes(len(grid), 'little').translate(FOG_ALPHA)
+            self.mask = pygame.image.frombuffer(self.pixels, (grid.width, grid.height), 'RGBA')
+            profiler.alloc()
+            grid.vis_dirty.clear()
+            self.version += 1
+        elif grid.vis_dirty:
+            alpha = COLORS['FOG_ALPHA']
+            explored, visible = grid.explored, grid.visible
+            for i in grid.vis_dirty:
+                self.pixels[i * 4 + 3] = alpha if explored[i] and not visible[i] else 0
+            grid.vis_dirty.clear()
+            self.version += 1
+
+    def draw(self, screen, camera):
+        x0, y0, x1, y1 = camera.visible_tile_range(self.grid.width, self.grid.height)
+        if x1 <= x0 or y1 <= y0: return
+        state = (self.version, x0, y0, x1, y1, camera.zoom)
+        if state != self.cached_state:
+            s = TILE_SIZE * camera.zoom
+            size = (int(x1 * s) - int(x0 * s), int(y1 * s) - int(y0 * s))
+            self.cached = pygame.transform.scale(self.mask.subsurface((x0, y0, x1 - x0, y1 - y0)), size)
+            profiler.alloc(2)
+            self.cached_state = state
+            self.origin = (int(x0 * s), int(y0 * s))
+        screen.blit(self.cached, (self.origin[0] + int(camera.scroll.x), self.origin[1] + int(camera.scroll.y)))
@@ -0,0 +1,52 @@
+import argparse, random, time
+from settings import *
+from main import Game
+
+MOVES = [('move', 1, 0), ('move', -1, 0), ('move', 0, 1), ('move', 0, -1)]
+
+def explore_policy(game, rng):
+    player = game.player
+    tile = game.map_data.get((player.x, player.y))
+    if tile and tile.type == 'stairs_down':
+        return ('stairs',)
+    if rng.random() < 0.7:
+        path = game.find_path((player.x, player.y), game.exit_pos)
+        if path:
+            nx, ny = path[0]
+            return ('move', nx - player.x, ny - player.y)
+    return rng.choice(MOVES + [('wait',)])
+
+def random_policy(game, rng):
+    return rng.choice(MOVES + [('wait',)])
+
+POLICIES = {'explore': explore_policy, 'random': random_policy}
+
+def simulate(turns, policy=explore_policy, seed=None):
+    game = Game(headless=True, seed=seed)
+    rng = random.Random(f"{game.rng.seed}:policy")
+    stats = {'turns': 0, 'deaths': 0, 'levels': 1}
+    start = time.perf_counter()
+    while stats['turns'] < turns:
+        if game.player.is_dead:
+            stats['deaths'] += 1
+            game.new_game(reset_player=True)
+        level = game.current_level
+        if game.perform(*policy(game, rng)):
+            stats['turns'] += 1
+        if game.current_level != level:
+            stats['levels'] += 1
+        if game.current_level >= MAX_LEVEL and policy is explore_policy:
+            game.new_game(reset_player=True)
+    stats['seconds'] = time.perf_counter() - start
+    stats['turns_per_sec'] = stats['turns'] / stats['seconds']
+    return game, stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run game turns without a display")
+    parser.add_argument('--turns', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='explore')
+    args = parser.parse_args()
+    _, stats = simulate(args.turns, POLICIES[args.policy], args.seed)
+    print(f"{stats['turns']} turns in {stats['seconds']:.2f}s ({stats['turns_per_sec']:.0f}/s), "
+          f"{stats['levels']} levels entered, {stats['deaths']} deaths")
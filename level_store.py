@@ -0,0 +1,68 @@
+import os, shelve, shutil, tempfile, weakref
+from collections import OrderedDict
+from settings import *
+
+class LevelStore:
+    def __init__(self, capacity=LEVEL_CACHE['MEMORY_LEVELS']):
+        self.capacity = capacity
+        self.recent = OrderedDict()
+        self.spilled = set()
+        self.shelf = None
+        self.directory = None
+
+    def __contains__(self, level):
+        return level in self.recent or level in self.spilled
+
+    def __len__(self):
+        return len(self.recent) + len(self.spilled)
+
+    def __iter__(self):
+        yield from sorted(set(self.recent) | self.spilled)
+
+    def __setitem__(self, level, record):
+        self.recent[level] = record
+        self.recent.move_to_end(level)
+        self.spilled.discard(level)
+        while len(self.recent) > self.capacity:
+            old_level, old_record = self.recent.popitem(last=False)
+            self._spill(old_level, old_record)
+
+    def __getitem__(self, level):
+        if level in self.recent:
+            self.recent.move_to_end(level)
+            return self.recent[level]
+        if level not in self.spilled:
+            raise KeyError(level)
+        record = self.shelf[str(level)]
+        del self.shelf[str(level)]
+        self.spilled.discard(level)
+        self[level] = record
+        return record
+
+    def records(self):
+        for level in self:
+            if level in self.recent:
+                yield level, self.recent[level]
+            else:
+                yield level, self.shelf[str(level)]
+
+    def _spill(self, level, record):
+        if self.shelf is None:
+            self.directory = tempfile.mkdtemp(prefix='roguelike-levels-')
+            self.shelf = shelve.open(os.path.join(self.directory, 'levels'))
+            self._cleanup = weakref.finalize(self, self._remove, self.shelf, self.directory)
+        self.shelf[str(level)] = record
+        self.spilled.add(level)
+
+    @staticmethod
+    def _remove(shelf, directory):
+        shelf.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    def clear(self):
+        self.recent.clear()
+        self.spilled.clear()
+        if self.shelf is not None:
+            self._cleanup()
+            self.shelf = None
+            self.directory = None
@@ -1,9 +1,21 @@
-import pygame, sys
+import pygame, os, sys, time
 from settings import *
-from map_generator import MapGenerator
+from map_generator import pack_rooms, unpack_rooms
+from level_store import LevelStore
+from tile_grid import TileGrid
 from entities import Player, Enemy, Item, Chest
-from utils import Camera, compute_fov
+from utils import Camera, DistanceField, PathCache, PatrolIndex, FOV_ENGINES
 from spritesheet import SpriteSheet
+from sprite_cache import SpriteCache
+from terrain import TerrainLayer
+from fog import FogLayer
+from occupancy import Occupancy
+from scheduler import TurnScheduler
+from batch_ai import BatchAI
+from rng import GameRng
+from savegame import write_run, read_run
+from prefetch import LevelPrefetcher
+from profiler import profiler, TrackedFont
 
 class Log:
     def __init__(self):
@@ -13,25 +25,43 @@ class Log:
         if len(self.messages) > 6: self.messages.pop(0)
 
 class Game:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption(TITLE)
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("Arial", UI_SETTINGS['FONT_SIZE'])
-        self.big_font = pygame.font.SysFont("Arial", UI_SETTINGS['BIG_FONT_SIZE'], bold=True)
-        self.debug_font = pygame.font.SysFont("Arial", UI_SETTINGS['DEBUG_FONT_SIZE'], bold=True)
-        self.spritesheet = SpriteSheet("assets/sprites.png")
-        self.assets = self._load_sprites()
+    def __init__(self, headless=False, seed=None):
+        self.headless = headless
+        self.profiler = profiler
+        self.rng = GameRng(seed)
+        if not headless:
+            pygame.init()
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption(TITLE)
+            self.clock = pygame.time.Clock()
+            self.font = TrackedFont(pygame.font.SysFont("Arial", UI_SETTINGS['FONT_SIZE']), profiler)
+            self.big_font = TrackedFont(pygame.font.SysFont("Arial", UI_SETTINGS['BIG_FONT_SIZE'], bold=True), profiler)
+            self.debug_font = TrackedFont(pygame.font.SysFont("Arial", UI_SETTINGS['DEBUG_FONT_SIZE'], bold=True), profiler)
+            self.profiler_font = TrackedFont(pygame.font.SysFont("Courier New", UI_SETTINGS['DEBUG_FONT_SIZE']), profiler)
+            self.spritesheet = SpriteSheet("assets/sprites.png")
+            self.assets = self._load_sprites()
+            self.sprites = SpriteCache(self.assets)
+            self.terrain = TerrainLayer(self.sprites)
+            self.fog = FogLayer()
         self.log = Log()
         self.current_level = 1
         self.camera = Camera(WIDTH, HEIGHT)
         self.floating_texts = []
         self.show_inventory = False
         self.debug_mode = False
+        self.victory = False
         self.stats = {'kills': 0, 'moves': 0, 'level_max_reached': 1}
-        self.saved_levels = {}
-        self.new_game(reset_player=True)
+        self.saved_levels = LevelStore()
+        self.visible_cells = set()
+        self.fov_grid = None
+        self.aware_enemies = {}
+        self.occupancy = Occupancy()
+        self.scheduler = TurnScheduler()
+        self.batch_ai = BatchAI(self) if BatchAI.available() else None
+        self.flow_field = None
+        self.path_cache = None
+        self.levels = LevelPrefetcher(0 if headless else PREFETCH['WORKERS'])
+        self.new_game(reset_player=True, seed=self.rng.seed)
 
     def _load_sprites(self):
         assets = {}
@@ -43,35 +73,102 @@ class Game:
 
     def save_level_state(self):
         if not hasattr(self, 'map_data'): return
-        self.saved_levels[self.current_level] = {
-            'map_data': self.map_data,
-            'enemies': self.enemies,
-            'items': self.items,
-            'chests': self.chests,
-            'rooms': self.rooms,
+        self.saved_levels[self.current_level] = self.pack_level()
+
+    def pack_level(self):
+        return {
+            'tiles': self.map_data.pack(),
+            'enemies': [e.to_record() for e in self.enemies],
+            'items': [i.to_record() for i in self.items],
+            'chests': [c.to_record() for c in self.chests],
+            'rooms': pack_rooms(self.rooms),
             'exit_pos': self.exit_pos,
             'player_start': self.level_start_pos,
-            'explored': True
+            'rng': self.level_rng,
+            'clock': self.scheduler.now
         }
 
     def load_level_state(self, level_num):
-        data = self.saved_levels[level_num]
-        self.map_data = data['map_data']
-        self.enemies = data['enemies']
-        self.items = data['items']
-        self.chests = data['chests']
-        self.rooms = data['rooms']
+        self.unpack_level(self.saved_levels[level_num])
+
+    def unpack_level(self, data):
+        self.map_data = TileGrid.unpack(data['tiles'])
+        self.enemies = [Enemy.from_record(r, self) for r in data['enemies']]
+        self.items = [Item.from_record(r, self) for r in data['items']]
+        self.chests = [Chest.from_record(r, self) for r in data['chests']]
+        self.rooms = unpack_rooms(data['rooms'])
         self.exit_pos = data['exit_pos']
         self.level_start_pos = data['player_start']
-        for e in self.enemies: e.game = self
-        for i in self.items: i.game = self
-        for c in self.chests: c.game = self
+        self.level_rng = data['rng']
+        self.patrol_index = PatrolIndex(self.map_data, self.rooms)
+        self.occupancy.rebuild(self.enemies, self.chests, self.items)
+        self.scheduler.reset(self.enemies, data['clock'])
+
+    def save_run(self, path):
+        levels = dict(self.saved_levels.records())
+        levels[self.current_level] = self.pack_level()
+        state = {
+            'level': self.current_level,
+            'rng': self.rng,
+            'player': self.player.to_record(),
+            'stats': dict(self.stats),
+            'log': list(self.log.messages)
+        }
+        write_run(path, state, levels)
+
+    def load_run(self, path):
+        state, levels = read_run(path)
+        self.levels.discard()
+        self.saved_levels.clear()
+        self.rng = state['rng']
+        self.current_level = state['level']
+        self.stats = state['stats']
+        self.log.messages = state['log']
+        for level, record in levels.items():
+            if level != self.current_level:
+                self.saved_levels[level] = record
+        self.unpack_level(levels[self.current_level])
+        self.player = Player.from_record(state['player'], self)
+        self.victory = False
+        self.floating_texts = []
+        self.camera.center_on(self.player.x, self.player.y)
+        self.update_fov()
+        self.prefetch_neighbours()
+
+    def autosave(self):
+        if self.headless: return
+        try:
+            self.save_run(SAVE['AUTOSAVE'])
+        except OSError as e:
+            print(f"[Game] Автозбереження не вдалося: {e}")
+
+    def quick_save(self):
+        try:
+            self.save_run(SAVE['QUICKSAVE'])
+            self.log.add("Гру збережено.")
+        except OSError as e:
+            self.log.add(f"Не вдалося зберегти: {e}")
 
-    def new_game(self, reset_player=False, going_up=False, save_old=True):
+    def quick_load(self):
+        saves = [p for p in (SAVE['QUICKSAVE'], SAVE['AUTOSAVE']) if os.path.exists(p)]
+        if not saves:
+            self.log.add("Немає збереження.")
+            return
+        path = max(saves, key=os.path.getmtime)
+        try:
+            self.load_run(path)
+            self.log.add(f"Завантажено: {path}")
+        except (OSError, ValueError) as e:
+            self.log.add(f"Не вдалося завантажити: {e}")
+
+    def new_game(self, reset_player=False, going_up=False, save_old=True, seed=None):
         if not reset_player and save_old:
             self.save_level_state()
         if reset_player:
-            self.saved_levels = {}
+            self.rng = GameRng(seed) if seed is not None else self.rng.next_run()
+            print(f"[Game] Seed: {self.rng.seed}")
+            self.levels.discard()
+            self.saved_levels.clear()
             self.current_level = 1
             self.stats = {'kills': 0, 'moves': 0, 'level_max_reached': 1}
         self.log.add(f"--- Рівень {self.current_level} ---")
@@ -81,19 +178,24 @@ class Game:
             p_start = self.level_start_pos
         else:
             print(f"[Game] ГЕНЕРАЦІЯ нового рівня {self.current_level}...")
-            gen = MapGenerator(self.current_level)
-            self.map_data, p_start, self.exit_pos, enemies_pos, items_data, chests_pos = gen.generate()
-            self.rooms = gen.rooms
+            data = self.levels.take(self.rng.seed, self.current_level)
+            self.level_rng = data['rng']
+            self.map_data = TileGrid.unpack(data['tiles'])
+            self.rooms = unpack_rooms(data['rooms'])
+            self.patrol_index = PatrolIndex(self.map_data, self.rooms)
+            p_start, self.exit_pos = data['player_start'], data['exit_pos']
             self.level_start_pos = p_start
             self.enemies = []
-            for (ex, ey) in enemies_pos:
+            for (ex, ey) in data['enemies']:
                 self.enemies.append(Enemy(ex, ey, self.current_level, self))
             self.items = []
-            for i_data in items_data:
+            for i_data in data['items']:
                 self.items.append(Item(i_data['pos'][0], i_data['pos'][1], i_data['name'], self, i_data.get('color')))
             self.chests = []
-            for (cx, cy) in chests_pos:
+            for (cx, cy) in data['chests']:
                 self.chests.append(Chest(cx, cy, self))
+            self.occupancy.rebuild(self.enemies, self.chests, self.items)
+            self.scheduler.reset(self.enemies)
         if reset_player or not hasattr(self, 'player'):
             self.player = Player(p_start[0], p_start[1], self)
         else:
@@ -106,34 +208,139 @@ class Game:
             self.stats['level_max_reached'] = self.current_level
         self.camera.center_on(self.player.x, self.player.y)
         self.update_fov()
+        self.prefetch_neighbours()
+
+    def prefetch_neighbours(self):
+        wanted = [(self.rng.seed, level) for level in (self.current_level + 1, self.current_level - 1)
+                  if 1 <= level <= MAX_LEVEL and level not in self.saved_levels]
+        self.levels.discard(keep=wanted)
+        for seed, level in wanted:
+            self.levels.request(seed, level)
 
     def update_fov(self):
-        visible = compute_fov(self.player.x, self.player.y, FOV_RADIUS, self.map_data)
-        for pos in visible:
-            self.map_data[pos].visible = True
-            self.map_data[pos].explored = True
-        for pos, tile in self.map_data.items():
-            if pos not in visible: tile.visible = False
+        grid = self.map_data
+        visible = FOV_ENGINES[FOV_ENGINE](self.player.x, self.player.y, FOV_RADIUS, grid)
+        if self.fov_grid is not grid:
+            grid.clear_visible()
+            self.visible_cells = set()
+            self.fov_grid = grid
+        revealed = visible - self.visible_cells
+        hidden = self.visible_cells - visible
+        w = grid.width
+        for x, y in hidden:
+            i = y * w + x
+            grid.visible[i] = 0
+            grid.vis_dirty.add(i)
+        for x, y in revealed:
+            i = y * w + x
+            grid.visible[i] = 1
+            grid.vis_dirty.add(i)
+            if not grid.explored[i]:
+                grid.explored[i] = 1
+                grid.dirty.add(i)
+        self.visible_cells = visible
+
+    def update_awareness(self):
+        px, py = self.player.x, self.player.y
+        enemy_cells = self.occupancy.layers['enemy']
+        if len(enemy_cells) < len(self.visible_cells):
+            seen = [pos for pos in enemy_cells if pos in self.visible_cells]
+        else:
+            seen = [pos for pos in self.visible_cells if pos in enemy_cells]
+        aware = {}
+        for x, y in seen:
+            d_sq = (x - px)**2 + (y - py)**2
+            for e in enemy_cells[(x, y)]:
+                if d_sq <= e.vision_radius**2:
+                    aware[e] = True
+        self.aware_enemies = aware
+
+    def make_noise(self, x, y, radius):
+        enemy_cells = self.occupancy.layers['enemy']
+        r_sq = radius * radius
+        if len(enemy_cells) < (2 * radius + 1)**2:
+            heard = [pos for pos in enemy_cells if (pos[0] - x)**2 + (pos[1] - y)**2 <= r_sq]
+        else:
+            heard = [(hx, hy) for hy in range(y - radius, y + radius + 1) for hx in range(x - radius, x + radius + 1)
+                     if (hx, hy) in enemy_cells and (hx - x)**2 + (hy - y)**2 <= r_sq]
+        for pos in heard:
+            for e in enemy_cells[pos]:
+                if e.state == 'sleep':
+                    e.alert('hunt', (x, y))
+
+    def process_enemy_turns(self):
+        act = Enemy.take_turn
+        if self.profiler.enabled:
+            clock = time.perf_counter
+            def act(e):
+                state = e.state
+                start = clock()
+                delay = e.take_turn()
+                self.profiler.add(f'ai.{state}', clock() - start)
+                return delay
+        if self.batch_ai and len(self.scheduler) >= AI['BATCH_MIN_ENEMIES']:
+            self.batch_ai.run_turn(act)
+            return
+        self.update_awareness()
+        for e in self.aware_enemies: self.scheduler.wake(e)
+        self.scheduler.advance(act)
+
+    def player_field(self):
+        if self.flow_field is None or self.flow_field.grid is not self.map_data:
+            self.flow_field = DistanceField(self.map_data, AI['FLOW_FIELD_RADIUS'])
+        self.flow_field.update((self.player.x, self.player.y))
+        return self.flow_field
+
+    def find_path(self, start, goal, blocking_entities=None, ignore=None):
+        if self.path_cache is None or self.path_cache.grid is not self.map_data:
+            self.path_cache = PathCache(self.map_data, AI['PATH_CACHE_SIZE'])
+        return self.path_cache.get_path(start, goal, blocking_entities, ignore)
 
     def get_enemy_at(self, x, y):
-        for e in self.enemies:
-            if e.x == x and e.y == y: return e
-        return None
+        return self.occupancy.get('enemy', x, y)
 
     def get_chest_at(self, x, y):
-        for c in self.chests:
-            if c.x == x and c.y == y: return c
-        return None
+        return self.occupancy.get('chest', x, y)
+
+    def get_items_at(self, x, y):
+        return self.occupancy.all_at('item', x, y)
+
+    def add_enemy(self, enemy):
+        self.enemies.append(enemy)
+        self.occupancy.add('enemy', enemy)
+        if enemy.state != 'sleep':
+            self.scheduler.wake(enemy)
+
+    def remove_enemy(self, enemy):
+        if enemy in self.enemies:
+            self.enemies.remove(enemy)
+            self.occupancy.remove('enemy', enemy)
+            self.scheduler.remove(enemy)
+            self.map_data.bump_region(enemy.x, enemy.y)
+
+    def add_item(self, item):
+        self.items.append(item)
+        self.occupancy.add('item', item)
+
+    def remove_item(self, item):
+        if item in self.items:
+            self.items.remove(item)
+            self.occupancy.remove('item', item)
+
+    def remove_chest(self, chest):
+        if chest in self.chests:
+            self.chests.remove(chest)
+            self.occupancy.remove('chest', chest)
 
     def is_blocked(self, x, y):
         if (x, y) not in self.map_data: return True
-        if self.map_data[(x, y)].blocked: return True
-        if self.get_enemy_at(x, y): return True
-        if self.get_chest_at(x, y) and not self.get_chest_at(x, y).is_open: return True
+        if self.map_data.opaque[self.map_data.index(x, y)]: return True
+        if (x, y) in self.occupancy.blocked: return True
         if (self.player.x, self.player.y) == (x, y): return True
         return False
 
     def add_floating_text(self, text, x, y, color):
+        if self.headless: return
         self.floating_texts.append({'text': text, 'x': x, 'y': y, 'timer': 60, 'color': color, 'offset_y': 0.0})
 
     def show_victory_screen(self):
@@ -164,6 +371,7 @@ class Game:
 
     def draw_inventory(self):
         s = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        self.profiler.alloc()
         s.fill(COLORS['PANEL_BG'])
         self.screen.blit(s, (0, 0))
         rect_dims = UI_SETTINGS['INVENTORY_RECT']
@@ -184,93 +392,81 @@ class Game:
             y_off += 25
 
     def draw(self):
+        with self.profiler.phase('terrain'):
+            occupied_cells = self.draw_terrain()
+        with self.profiler.phase('entities'):
+            self.draw_entities(occupied_cells)
+        with self.profiler.phase('hud'):
+            self.draw_hud()
+        with self.profiler.phase('flip'):
+            pygame.display.flip()
+
+    def draw_terrain(self):
         biome = BIOMES.get((self.current_level-1)//LEVELS_PER_BIOME, BIOMES[0])
         self.screen.fill(biome['bg'])
+        self.sprites.sync(self.camera.zoom)
         occupied_cells = set()
         occupied_cells.add((self.player.x, self.player.y))
         for e in self.enemies: occupied_cells.add((e.x, e.y))
         for i in self.items: occupied_cells.add((i.x, i.y))
 
-        for (x, y), tile in self.map_data.items():
-            if not tile.explored and not self.debug_mode: continue
-            rect = pygame.Rect(x*TILE_SIZE, y*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-            screen_rect = self.camera.apply_rect(rect)
-            if screen_rect.right < 0 or screen_rect.left > WIDTH or screen_rect.bottom < 0 or screen_rect.top > HEIGHT:
-                continue
-            if tile.type in ['floor', 'door', 'stairs_down', 'stairs_up']:
-                key = 'floor'
-                if tile.variant == 1: key = 'floor_dec_1'
-                elif tile.variant == 2: key = 'floor_dec_2'
-                img = self.assets[key].copy()
-                img.fill(biome['floor_tint'], special_flags=pygame.BLEND_RGBA_MULT)
-                scaled = pygame.transform.scale(img, (screen_rect.width, screen_rect.height))
-                self.screen.blit(scaled, screen_rect)
-            img = None
-            if tile.type == 'wall':
-                wall_keys = ['wall_1', 'wall_2', 'wall_3']
-                key = wall_keys[tile.variant % 3]
-                img = self.assets[key].copy()
-                img.fill(biome['wall_tint'], special_flags=pygame.BLEND_RGBA_MULT)
-            elif tile.type == 'door':
-                if (x, y) not in occupied_cells:
-                    img = self.assets['door_open' if tile.is_open else 'door_closed']
-            elif tile.type == 'stairs_down':
-                if (x, y) != (self.player.x, self.player.y): img = self.assets['stairs_down']
-            elif tile.type == 'stairs_up':
-                if (x, y) != (self.player.x, self.player.y): img = self.assets['stairs_up']
-            if img:
-                scaled = pygame.transform.scale(img, (screen_rect.width, screen_rect.height))
-                self.screen.blit(scaled, screen_rect)
-            if not tile.visible and not self.debug_mode:
-                s = pygame.Surface((screen_rect.width, screen_rect.height), pygame.SRCALPHA)
-                s.fill((0, 0, 0, 150))
-                self.screen.blit(s, screen_rect)
+        grid = self.map_data
+        x0, y0, x1, y1 = self.camera.visible_tile_range(grid.width, grid.height)
+        grid.ensure(x0, y0, x1, y1)
+        hidden = {(x, y) for x, y in occupied_cells if x0 <= x < x1 and y0 <= y < y1 and grid.type_at(x, y) == 'door'}
+        if grid.type_at(self.player.x, self.player.y) in ('stairs_down', 'stairs_up'):
+            hidden.add((self.player.x, self.player.y))
+        self.terrain.sync(grid, biome, self.camera.zoom, self.debug_mode)
+        self.terrain.set_hidden(hidden)
+        self.terrain.draw(self.screen, self.camera)
+        if not self.debug_mode:
+            self.fog.sync(grid)
+            self.fog.draw(self.screen, self.camera)
+        return occupied_cells
+
+    def draw_entities(self, occupied_cells):
+        grid = self.map_data
+        x0, y0, x1, y1 = self.camera.visible_tile_range(grid.width, grid.height)
+        size = self.camera.tile_size()
+        to_screen = self.camera.tile_to_screen
+        visible = grid.visible
+        w = grid.width
+        def on_screen(e):
+            return x0 <= e.x < x1 and y0 <= e.y < y1 and (visible[e.y * w + e.x] or self.debug_mode)
 
+        batch = []
         for chest in self.chests:
-            if self.map_data[(chest.x, chest.y)].visible or self.debug_mode:
-                if (chest.x, chest.y) not in occupied_cells:
-                    r = pygame.Rect(chest.x*TILE_SIZE, chest.y*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                    sr = self.camera.apply_rect(r)
-                    key = 'chest_open' if chest.is_open else 'chest'
-                    img = self.assets.get(key, self.assets['chest'])
-                    scaled = pygame.transform.scale(img, (sr.width, sr.height))
-                    self.screen.blit(scaled, sr)
-
-        for item in self.items:
-            if self.map_data[(item.x, item.y)].visible or self.debug_mode:
-                if item.data['type'] == 'artifact':
-                    rect = pygame.Rect(item.x * TILE_SIZE, item.y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                    sr = self.camera.apply_rect(rect)
-                    scaled = pygame.transform.scale(self.assets['artifact'], (sr.width, sr.height))
-                    self.screen.blit(scaled, sr)
-                else:
-                    item.draw(self.screen, self.camera, self.assets)
+            if on_screen(chest) and (chest.x, chest.y) not in occupied_cells:
+                key = 'chest_open' if chest.is_open else 'chest'
+                if key not in self.assets: key = 'chest'
+                batch.append((self.sprites.get(key, size), to_screen(chest.x, chest.y)))
+        self.screen.blits(batch, False)
+
+        batch = [(item.sprite(self.sprites, size), to_screen(item.x, item.y)) for item in self.items if on_screen(item)]
+        self.screen.blits(batch, False)
+
+        shown_enemies = [e for e in self.enemies if on_screen(e)]
+        batch = [(self.sprites.get(e.sprite_key, size), to_screen(e.x, e.y)) for e in shown_enemies]
+        self.screen.blits(batch, False)
+        for enemy in shown_enemies:
+            sr = pygame.Rect(to_screen(enemy.x, enemy.y), size)
+            bar_w = sr.width
+            hp_pct = max(0, enemy.hp / enemy.max_hp)
+            pygame.draw.rect(self.screen, COLORS['RED'], (sr.x, sr.y - 5, bar_w * hp_pct, 4))
+            if self.debug_mode:
+                path_len = len(enemy.path) if enemy.path else 0
+                debug_txt = f"{enemy.state} ({path_len})"
+                txt_surf = self.debug_font.render(debug_txt, True, COLORS['WHITE'])
+                txt_x = sr.centerx - txt_surf.get_width() // 2
+                txt_y = sr.top - 20
+                bg_rect = pygame.Rect(txt_x - 2, txt_y - 2, txt_surf.get_width() + 4, txt_surf.get_height() + 4)
+                pygame.draw.rect(self.screen, COLORS['DEBUG_BG'], bg_rect)
+                self.screen.blit(txt_surf, (txt_x, txt_y))
 
-        for enemy in self.enemies:
-            if self.map_data[(enemy.x, enemy.y)].visible or self.debug_mode:
-                r = pygame.Rect(enemy.x*TILE_SIZE, enemy.y*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                sr = self.camera.apply_rect(r)
-                scaled = pygame.transform.scale(self.assets[enemy.sprite_key], (sr.width, sr.height))
-                self.screen.blit(scaled, sr)
-                bar_w = sr.width
-                hp_pct = max(0, enemy.hp / enemy.max_hp)
-                pygame.draw.rect(self.screen, COLORS['RED'], (sr.x, sr.y - 5, bar_w * hp_pct, 4))
-                if self.debug_mode:
-                    path_len = len(enemy.path) if enemy.path else 0
-                    debug_txt = f"{enemy.state} ({path_len})"
-                    txt_surf = self.debug_font.render(debug_txt, True, COLORS['WHITE'])
-                    txt_x = sr.centerx - txt_surf.get_width() // 2
-                    txt_y = sr.top - 20
-                    bg_rect = pygame.Rect(txt_x - 2, txt_y - 2, txt_surf.get_width() + 4, txt_surf.get_height() + 4)
-                    pygame.draw.rect(self.screen, COLORS['DEBUG_BG'], bg_rect)
-                    self.screen.blit(txt_surf, (txt_x, txt_y))
-
-        pr = pygame.Rect(self.player.x*TILE_SIZE, self.player.y*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-        spr = self.camera.apply_rect(pr)
         sprite_key = 'grave' if self.player.is_dead else 'player'
-        scaled_p = pygame.transform.scale(self.assets[sprite_key], (spr.width, spr.height))
-        self.screen.blit(scaled_p, spr)
+        self.screen.blit(self.sprites.get(sprite_key, size), to_screen(self.player.x, self.player.y))
 
+    def draw_hud(self):
         for ft in self.floating_texts[:]:
             ft['timer'] -= 1
             ft['offset_y'] -= 0.5
@@ -311,83 +507,109 @@ class Game:
                     if len(points) > 1:
                         pygame.draw.lines(self.screen, COLORS['RED'], False, points, 2)
                         pygame.draw.circle(self.screen, COLORS['GREEN'], points[-1], 4)
+            self.profiler.draw(self.screen, self.profiler_font)
         if self.player.is_dead:
             self.draw_game_over()
-        pygame.display.flip()
+
+    def perform(self, action, *args):
+        turn_taken = False
+        if action == 'move':
+            turn_taken = self.player.move(*args)
+            if turn_taken:
+                self.stats['moves'] += 1
+                self.camera.center_on(self.player.x, self.player.y)
+        elif action == 'wait':
+            turn_taken = self.player.wait()
+        elif action == 'stairs':
+            self.use_stairs()
+        elif action == 'use':
+            self.player.use_item(*args)
+        elif action == 'drop':
+            self.player.drop_item(*args)
+        if turn_taken:
+            with self.profiler.phase('update_fov'):
+                self.update_fov()
+            with self.profiler.phase('ai'):
+                self.process_enemy_turns()
+        return turn_taken
+
+    def use_stairs(self):
+        px, py = self.player.x, self.player.y
+        tile = self.map_data.get((px, py))
+        if not tile: return
+        if tile.type == 'stairs_down':
+            self.save_level_state()
+            self.current_level += 1
+            self.log.add("Ви спустилися глибше...")
+            self.new_game(going_up=False, save_old=False)
+            self.autosave()
+        elif tile.type == 'stairs_up':
+            if self.current_level == 1:
+                if WIN_ITEM in self.player.inventory:
+                    self.victory = True
+                    if not self.headless:
+                        self.show_victory_screen()
+                else:
+                    self.log.add("Ви не можете піти без Артефакту!")
+            else:
+                self.save_level_state()
+                self.current_level -= 1
+                self.log.add("Ви піднялися вище...")
+                self.new_game(going_up=True, save_old=False)
+                self.autosave()
+        else:
+            self.log.add("Тут немає сходів.")
 
     def run(self):
         while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT: pygame.quit(); sys.exit()
-                self.camera.handle_event(event)
-                if event.type == pygame.KEYDOWN:
-                    if self.player.is_dead:
-                        if event.key == pygame.K_r:
-                            self.new_game(reset_player=True)
-                        continue
-                    if event.key == pygame.K_F1:
-                        self.debug_mode = not self.debug_mode
-                        self.log.add(f"Debug Mode: {self.debug_mode}")
-                        if self.debug_mode:
-                            if WIN_ITEM not in self.player.inventory:
-                                self.player.inventory.append(WIN_ITEM)
-                                self.log.add("DEBUG: Отримано Амулет!")
-                    if event.key == pygame.K_i:
-                        self.show_inventory = not self.show_inventory
-                    if self.show_inventory:
-                        if pygame.K_1 <= event.key <= pygame.K_9:
-                            idx = event.key - pygame.K_1
-                            mods = pygame.key.get_mods()
-                            if mods & pygame.KMOD_SHIFT:
-                                self.player.drop_item(idx)
-                            else:
-                                self.player.use_item(idx)
-                    else:
-                        dx, dy = 0, 0
-                        turn_taken = False
-                        if event.key == pygame.K_LEFT: dx = -1
-                        elif event.key == pygame.K_RIGHT: dx = 1
-                        elif event.key == pygame.K_UP: dy = -1
-                        elif event.key == pygame.K_DOWN: dy = 1
-                        elif event.key == pygame.K_SPACE:
-                            turn_taken = self.player.wait()
-                        elif event.key == pygame.K_RETURN:
-                            px, py = self.player.x, self.player.y
-                            tile = self.map_data.get((px, py))
-                            if tile:
-                                if tile.type == 'stairs_down':
-                                    self.save_level_state()
-                                    self.current_level += 1
-                                    self.log.add("Ви спустилися глибше...")
-                                    self.new_game(going_up=False, save_old=False)
-                                elif tile.type == 'stairs_up':
-                                    if self.current_level == 1:
-                                        if WIN_ITEM in self.player.inventory:
-                                            self.show_victory_screen()
-                                        else:
-                                            self.log.add("Ви не можете піти без Артефакту!")
-                                    else:
-                                        self.save_level_state()
-                                        self.current_level -= 1
-                                        self.log.add("Ви піднялися вище...")
-                                        self.new_game(going_up=True, save_old=False)
+            with self.profiler.phase('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT: pygame.quit(); sys.exit()
+                    self.camera.handle_event(event)
+                    if event.type == pygame.KEYDOWN:
+                        if self.player.is_dead:
+                            if event.key == pygame.K_r:
+                                self.new_game(reset_player=True)
+                            continue
+                        if event.key == pygame.K_F1:
+                            self.debug_mode = not self.debug_mode
+                            self.profiler.enabled = self.debug_mode
+                            self.profiler.reset()
+                            self.log.add(f"Debug Mode: {self.debug_mode}")
+                            if self.debug_mode:
+                                if WIN_ITEM not in self.player.inventory:
+                                    self.player.inventory.append(WIN_ITEM)
+                                    self.log.add("DEBUG: Отримано Амулет!")
+                        if event.key == pygame.K_F5:
+                            self.quick_save()
+                        if event.key == pygame.K_F9:
+                            self.quick_load()
+                        if event.key == pygame.K_i:
+                            self.show_inventory = not self.show_inventory
+                        if self.show_inventory:
+                            if pygame.K_1 <= event.key <= pygame.K_9:
+                                idx = event.key - pygame.K_1
+                                mods = pygame.key.get_mods()
+                                if mods & pygame.KMOD_SHIFT:
+                                    self.perform('drop', idx)
                                 else:
-                                    self.log.add("Тут немає сходів.")
-                        if dx!=0 or dy!=0:
-                            turn_taken = self.player.move(dx, dy)
-                            if turn_taken:
-                                self.stats['moves'] += 1
-                                self.camera.center_on(self.player.x, self.player.y)
-                        if turn_taken:
-                            self.update_fov()
-                            for e in self.enemies: e.take_turn()
+                                    self.perform('use', idx)
+                        else:
+                            if event.key == pygame.K_LEFT: self.perform('move', -1, 0)
+                            elif event.key == pygame.K_RIGHT: self.perform('move', 1, 0)
+                            elif event.key == pygame.K_UP: self.perform('move', 0, -1)
+                            elif event.key == pygame.K_DOWN: self.perform('move', 0, 1)
+                            elif event.key == pygame.K_SPACE: self.perform('wait')
+                            elif event.key == pygame.K_RETURN: self.perform('stairs')
             self.camera.update()
             self.draw()
+            self.profiler.end_frame()
             self.clock.tick(FPS)
 
     def draw_game_over(self):
         panel_w, panel_h = UI_SETTINGS['GAME_OVER_PANEL']
         s = pygame.Surface((panel_w, panel_h), pygame.SRCALPHA)
+        self.profiler.alloc()
         s.fill(COLORS['PANEL_BG'])
         pygame.draw.rect(s, COLORS['GAME_OVER_BORDER'], (0, 0, panel_w, panel_h), 2)
         title = self.big_font.render("R.I.P.", True, COLORS['GAME_OVER_TEXT'])
@@ -1,6 +1,9 @@
-import random
 import pygame
+from array import array
+from collections import deque
 from settings import *
+from tile_grid import TileGrid, TYPE_IDS, FLOOR, WALL, DOOR, VOID_TO_WALL
+from rng import LevelRng, new_seed
 
 class Room:
     def __init__(self, rect, type_='normal'):
@@ -8,51 +11,133 @@ class Room:
         self.type = type_
         self.center = rect.center
 
-class Tile:
-    def __init__(self, x, y, type_):
-        self.x, self.y = x, y
-        self.type = type_
-        self.visible = False
-        self.explored = False
-        self.variant = random.randint(0, 2)
-        self.is_open = False
-        self.locked = False
-        self.key_color = None
+def generate_level(seed, level):
+    rng = LevelRng(seed, level)
+    gen = MapGenerator(level, rng)
+    tiles, player_start, exit_pos, enemies, items, chests = gen.generate()
+    return {
+        'seed': seed,
+        'level': level,
+        'tiles': tiles.pack(),
+        'rooms': pack_rooms(gen.rooms),
+        'player_start': player_start,
+        'exit_pos': exit_pos,
+        'enemies': enemies,
+        'items': items,
+        'chests': chests,
+        'rng': rng
+    }
+
+def pack_rooms(rooms):
+    return [(tuple(r.rect), r.type) for r in rooms]
+
+def unpack_rooms(rooms):
+    return [Room(pygame.Rect(rect), type_) for rect, type_ in rooms]
+
+IS_FLOOR = bytes(1 if t == FLOOR else 0 for t in range(256))
+IS_WALL = bytes(1 if t == WALL else 0 for t in range(256))
+
+def _dilate(mask, w, h):
+    n = w * h
+    inner_left = int.from_bytes((b'\x00' + b'\x01' * (w - 1)) * h, 'little')
+    inner_right = int.from_bytes((b'\x01' * (w - 1) + b'\x00') * h, 'little')
+    row = mask | ((mask << 8) & inner_left) | ((mask >> 8) & inner_right)
+    return (row | (row << 8 * w) | (row >> 8 * w)) & ((1 << 8 * n) - 1)
+
+def _match_doors(local, start, count, step, across):
+    if count <= 0: return
+    end = start + count * step
+    hits = (int.from_bytes(local[start:end:step].translate(IS_FLOOR), 'little')
+            & int.from_bytes(local[start - across:end - across:step].translate(IS_WALL), 'little')
+            & int.from_bytes(local[start + across:end + across:step].translate(IS_WALL), 'little'))
+    if not hits: return
+    flags = hits.to_bytes(count, 'little')
+    k = flags.find(1)
+    while k != -1:
+        local[start + k * step] = DOOR
+        k = flags.find(1, k + 1)
+
+class LoopLayout:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.rooms = []
+        self.tunnels = []
+        self.stairs = {}
+        self.index = None
+
+    def __getstate__(self):
+        return dict(self.__dict__, index=None)
 
-    @property
-    def blocked(self):
-        if self.type == 'wall': return True
-        if self.type == 'door' and not self.is_open: return True
-        return False
+    def add_room(self, rect):
+        self.rooms.append((rect.left, rect.top, rect.right, rect.bottom))
 
-    @blocked.setter
-    def blocked(self, val):
-        if self.type == 'door':
-            self.is_open = not val
+    def add_tunnel_h(self, x1, x2, y):
+        self.tunnels.append((min(x1, x2), y, max(x1, x2) + 1, y + 1))
 
-    @property
-    def block_sight(self):
-        if self.type == 'wall': return True
-        if self.type == 'door' and not self.is_open: return True
-        return False
+    def add_tunnel_v(self, y1, y2, x):
+        self.tunnels.append((x, min(y1, y2), x + 1, max(y1, y2) + 1))
 
-    @block_sight.setter
-    def block_sight(self, val):
-        if self.type == 'door':
-            self.is_open = not val
+    def _build_index(self, ct):
+        self.index = {}
+        for kind, shapes in enumerate((self.rooms, self.tunnels)):
+            for shape in shapes:
+                x0, y0, x1, y1 = shape
+                for cy in range(max(0, y0 - 2) // ct, (y1 + 1) // ct + 1):
+                    for cx in range(max(0, x0 - 2) // ct, (x1 + 1) // ct + 1):
+                        self.index.setdefault((cx, cy), ([], []))[kind].append(shape)
+
+    def materialize(self, grid, x0, y0, x1, y1):
+        ct = grid.chunk_tiles
+        if self.index is None:
+            self._build_index(ct)
+        rooms, tunnels = self.index.get((x0 // ct, y0 // ct), ((), ()))
+        wx0, wy0 = max(0, x0 - 2), max(0, y0 - 2)
+        wx1, wy1 = min(self.width, x1 + 2), min(self.height, y1 + 2)
+        ww = wx1 - wx0
+        local = bytearray(ww * (wy1 - wy0))
+        for sx0, sy0, sx1, sy1 in list(rooms) + list(tunnels):
+            ax0, ax1 = max(sx0, wx0), min(sx1, wx1)
+            if ax0 >= ax1: continue
+            for y in range(max(sy0, wy0), min(sy1, wy1)):
+                o = (y - wy0) * ww - wx0
+                local[o + ax0:o + ax1] = bytes([FLOOR]) * (ax1 - ax0)
+        wh = wy1 - wy0
+        floor = int.from_bytes(local.translate(IS_FLOOR), 'little')
+        near = _dilate(floor, ww, wh)
+        local[:] = (floor * FLOOR + (near & ~floor) * WALL).to_bytes(ww * wh, 'little')
+        for left, top, right, bottom in rooms:
+            ax0, ax1 = max(left + 1, x0, wx0 + 1), min(right - 1, x1, wx1 - 1)
+            for y in (top - 1, bottom):
+                if y0 <= y < y1:
+                    _match_doors(local, (y - wy0) * ww + ax0 - wx0, ax1 - ax0, 1, 1)
+            ay0, ay1 = max(top + 1, y0, wy0 + 1), min(bottom - 1, y1, wy1 - 1)
+            for x in (left - 1, right):
+                if x0 <= x < x1:
+                    _match_doors(local, (ay0 - wy0) * ww + x - wx0, ay1 - ay0, ww, ww)
+        for (x, y), type_id in self.stairs.items():
+            if x0 <= x < x1 and y0 <= y < y1:
+                local[(y - wy0) * ww + x - wx0] = type_id
+        w = grid.width
+        for y in range(y0, y1):
+            o = (y - wy0) * ww - wx0
+            grid.types[y * w + x0:y * w + x1] = local[o + x0:o + x1]
 
 class MapGenerator:
-    def __init__(self, level):
+    def __init__(self, level, rng=None, size=None):
         self.level = level
-        self.width = 40 + (level // LEVELS_PER_BIOME) * LEVELS_PER_BIOME
-        self.height = 40 + (level // LEVELS_PER_BIOME) * LEVELS_PER_BIOME
-        self.tiles = {}
+        self.rng = rng or LevelRng(new_seed(), level)
+        if size:
+            self.width, self.height = size
+        else:
+            self.width = 40 + (level // LEVELS_PER_BIOME) * LEVELS_PER_BIOME
+            self.height = 40 + (level // LEVELS_PER_BIOME) * LEVELS_PER_BIOME
+        self.tiles = TileGrid(self.width, self.height)
+        self.tiles.roll_variants(self.rng.cosmetics)
         self.rooms = []
+        self.layout = None
 
     def generate(self):
-        for y in range(self.height):
-            for x in range(self.width):
-                self.tiles[(x, y)] = Tile(x, y, 'void')
         player_start = (0, 0)
         exit_pos = (0, 0)
         enemies = []
@@ -64,13 +149,17 @@ class MapGenerator:
             player_start, exit_pos, items, enemies = self._generate_maze_level()
         else:
             player_start, exit_pos, items, enemies, chests = self._generate_loop_level()
-        self.tiles[player_start] = Tile(player_start[0], player_start[1], 'stairs_up')
+        self._set_tile(player_start, 'stairs_up')
         if self.level < MAX_LEVEL:
-            self.tiles[exit_pos] = Tile(exit_pos[0], exit_pos[1], 'stairs_down')
+            self._set_tile(exit_pos, 'stairs_down')
         else:
             print(f"[MapGen] Spawning WIN ITEM at {exit_pos}")
-            self.tiles[exit_pos] = Tile(exit_pos[0], exit_pos[1], 'floor')
+            self._set_tile(exit_pos, 'floor')
             items.append({'pos': exit_pos, 'name': WIN_ITEM, 'color': None})
+        if self.layout is not None:
+            self.tiles.make_lazy(self.layout)
+            if len(self.tiles) < MAP_GEN['LAZY_MIN_AREA']:
+                self.tiles.ensure_all()
         return self.tiles, player_start, exit_pos, enemies, items, chests
 
     def _generate_loop_level(self):
@@ -78,7 +167,9 @@ class MapGenerator:
         sect_h = MAP_GEN['SECT_HEIGHT']
         grid_w = self.width // sect_w
         grid_h = self.height // sect_h
+        self.layout = LoopLayout(self.width, self.height)
         connections = []
+        connected = set()
         visited = {(0,0)}
         stack = [(0,0)]
         #======
@@ -91,54 +182,52 @@ class MapGenerator:
                     if (nx, ny) not in visited:
                         neighbors.append((nx, ny))
             if neighbors:
-                nx, ny = random.choice(neighbors)
+                nx, ny = self.rng.layout.choice(neighbors)
                 connections.append( ((cx, cy), (nx, ny)) )
+                connected.add(((cx, cy), (nx, ny)))
                 visited.add((nx, ny))
                 stack.append((nx, ny))
             else:
                 stack.pop()
         #======
         for _ in range(int(grid_w * grid_h * MAP_GEN['EXTRA_CONNECTIONS_FACTOR'])):
-            rx, ry = random.randint(0, grid_w-1), random.randint(0, grid_h-1)
+            rx, ry = self.rng.layout.randint(0, grid_w-1), self.rng.layout.randint(0, grid_h-1)
             dirs = [(0,1), (1,0)]
-            dx, dy = random.choice(dirs)
+            dx, dy = self.rng.layout.choice(dirs)
             nx, ny = rx+dx, ry+dy
             if 0 <= nx < grid_w and 0 <= ny < grid_h:
-                if ((rx, ry), (nx, ny)) not in connections and ((nx, ny), (rx, ry)) not in connections:
+                if ((rx, ry), (nx, ny)) not in connected and ((nx, ny), (rx, ry)) not in connected:
                     connections.append( ((rx, ry), (nx, ny)) )
+                    connected.add(((rx, ry), (nx, ny)))
         rooms_map = {}
         #======
         for gy in range(grid_h):
             for gx in range(grid_w):
-                rw = random.randint(MAP_GEN['MIN_ROOM_SIZE'], sect_w - 2)
-                rh = random.randint(MAP_GEN['MIN_ROOM_SIZE'], sect_h - 2)
-                rx = gx * sect_w + random.randint(1, sect_w - rw - 1)
-                ry = gy * sect_h + random.randint(1, sect_h - rh - 1)
+                rw = self.rng.layout.randint(MAP_GEN['MIN_ROOM_SIZE'], sect_w - 2)
+                rh = self.rng.layout.randint(MAP_GEN['MIN_ROOM_SIZE'], sect_h - 2)
+                rx = gx * sect_w + self.rng.layout.randint(1, sect_w - rw - 1)
+                ry = gy * sect_h + self.rng.layout.randint(1, sect_h - rh - 1)
                 room_rect = pygame.Rect(rx, ry, rw, rh)
                 rtype = 'normal'
-                if random.random() < MAP_GEN['TREASURE_ROOM_CHANCE']: rtype = 'treasure'
+                if self.rng.layout.random() < MAP_GEN['TREASURE_ROOM_CHANCE']: rtype = 'treasure'
                 new_room = Room(room_rect, rtype)
                 rooms_map[(gx, gy)] = new_room
                 self.rooms.append(new_room)
-                for y in range(room_rect.top, room_rect.bottom):
-                    for x in range(room_rect.left, room_rect.right):
-                        self.tiles[(x, y)] = Tile(x, y, 'floor')
+                self.layout.add_room(room_rect)
         #======
         for (p1, p2) in connections:
             r1 = rooms_map[p1]
             r2 = rooms_map[p2]
             c1 = r1.center
             c2 = r2.center
-            if random.random() < MAP_GEN['TUNNEL_RANDOMNESS']:
-                self._tunnel_h(c1[0], c2[0], c1[1])
-                self._tunnel_v(c1[1], c2[1], c2[0])
+            if self.rng.layout.random() < MAP_GEN['TUNNEL_RANDOMNESS']:
+                self.layout.add_tunnel_h(c1[0], c2[0], c1[1])
+                self.layout.add_tunnel_v(c1[1], c2[1], c2[0])
             else:
-                self._tunnel_v(c1[1], c2[1], c1[0])
-                self._tunnel_h(c1[0], c2[0], c2[1])
+                self.layout.add_tunnel_v(c1[1], c2[1], c1[0])
+                self.layout.add_tunnel_h(c1[0], c2[0], c2[1])
         #======
-        self._place_walls()
-        self._place_doors()
-        start_room = random.choice(self.rooms)
+        start_room = self.rng.layout.choice(self.rooms)
         start_room.type = 'start'
         best_exit = None
         max_dist = 0
@@ -163,50 +252,54 @@ class MapGenerator:
     def _generate_maze_level(self):
         maze_w = self.width // 2
         maze_h = self.height // 2
-        visited = set()
+        w = self.width
+        types = self.tiles.types
+        visited = bytearray(maze_w * maze_h)
+        self.maze_w = maze_w
+        self.maze_adj = array('i', [-1]) * (4 * maze_w * maze_h)
+        self.maze_degree = bytearray(maze_w * maze_h)
+        adj, degree = self.maze_adj, self.maze_degree
+        order = [0]
         stack = [(0, 0)]
-        visited.add((0, 0))
-        adjacency = {}
+        visited[0] = 1
         #======
         while stack:
             cx, cy = stack[-1]
-            neighbors = []
             directions = [(0,1), (0,-1), (1,0), (-1,0)]
-            random.shuffle(directions)
+            self.rng.layout.shuffle(directions)
             for dx, dy in directions:
                 nx, ny = cx + dx, cy + dy
                 if 0 <= nx < maze_w and 0 <= ny < maze_h:
-                    if (nx, ny) not in visited:
-                        real_x, real_y = cx * 2 + 1, cy * 2 + 1
-                        target_x, target_y = nx * 2 + 1, ny * 2 + 1
-                        mid_x, mid_y = real_x + dx, real_y + dy
-                        self.tiles[(real_x, real_y)] = Tile(real_x, real_y, 'floor')
-                        self.tiles[(target_x, target_y)] = Tile(target_x, target_y, 'floor')
-                        self.tiles[(mid_x, mid_y)] = Tile(mid_x, mid_y, 'floor')
-                        if (cx, cy) not in adjacency: adjacency[(cx, cy)] = []
-                        if (nx, ny) not in adjacency: adjacency[(nx, ny)] = []
-                        adjacency[(cx, cy)].append((nx, ny))
-                        adjacency[(nx, ny)].append((cx, cy))
-                        visited.add((nx, ny))
+                    node = ny * maze_w + nx
+                    if not visited[node]:
+                        curr = cy * maze_w + cx
+                        real = (cy * 2 + 1) * w + cx * 2 + 1
+                        step = dy * w + dx
+                        types[real] = types[real + step] = types[real + 2 * step] = FLOOR
+                        adj[4 * curr + degree[curr]] = node
+                        degree[curr] += 1
+                        adj[4 * node + degree[node]] = curr
+                        degree[node] += 1
+                        visited[node] = 1
+                        order.append(node)
                         stack.append((nx, ny))
                         break
             else:
                 stack.pop()
         #======
-        self._place_walls()
-        valid_floors = [k for k, v in self.tiles.items() if v.type == 'floor']
-        valid_nodes = list(adjacency.keys())
-        if valid_nodes:
-            temp_start = random.choice(valid_nodes)
+        self._place_maze_walls(maze_w, maze_h)
+        if len(order) > 1:
+            temp_start = self.rng.layout.choice(order)
         else:
-            temp_start = (0, 0)
+            temp_start = 0
 
-        real_start = self._bfs_find_node(temp_start, adjacency)
-        real_exit = self._bfs_find_node(real_start, adjacency)
-        path = self._bfs_path(real_start, real_exit, adjacency)
+        real_start = self._bfs_find_node(temp_start)
+        real_exit = self._bfs_find_node(real_start)
+        path = self._bfs_path(real_start, real_exit)
         if not path: path = [real_start, real_exit]
-        path_set = set(path)
-        num_keys = random.randint(MAP_GEN['MIN_KEYS'], MAP_GEN['MAX_KEYS'])
+        on_path = bytearray(len(degree))
+        for node in path: on_path[node] = 1
+        num_keys = self.rng.layout.randint(MAP_GEN['MIN_KEYS'], MAP_GEN['MAX_KEYS'])
         key_colors = [f'key_{i}' for i in range(num_keys)]
         segment_len = len(path) // (num_keys + 1)
         items = []
@@ -214,145 +307,120 @@ class MapGenerator:
         for i in range(num_keys):
             door_node_idx = (i + 1) * segment_len
             if door_node_idx >= len(path): door_node_idx = len(path) - 1
-            door_node = path[door_node_idx]
-            dx, dy = door_node[0]*2 + 1, door_node[1]*2 + 1
+            dx, dy = self._maze_cell(path[door_node_idx])
             if (dx, dy) in self.tiles:
-                self.tiles[(dx, dy)] = Tile(dx, dy, 'door')
-                self.tiles[(dx, dy)].is_open = False
+                self.tiles.set_tile(dx, dy, 'door')
                 self.tiles[(dx, dy)].locked = True
                 self.tiles[(dx, dy)].key_color = key_colors[i]
             segment_start = i * segment_len
             segment_end = door_node_idx
             segment_nodes = path[segment_start:segment_end]
-            random.shuffle(segment_nodes)
+            self.rng.layout.shuffle(segment_nodes)
             found_key_pos = None
             for anchor_node in segment_nodes:
-                branches = [n for n in adjacency.get(anchor_node, []) if n not in path_set]
+                branches = [n for n in self._maze_neighbors(anchor_node) if not on_path[n]]
                 if branches:
-                    start_branch = random.choice(branches)
-                    forbidden_area = set(path_set)
-                    forbidden_area.add(anchor_node)
+                    start_branch = self.rng.layout.choice(branches)
+                    forbidden_area = bytearray(on_path)
+                    forbidden_area[anchor_node] = 1
                     found_key_pos = self._bfs_find_node(
-                        start_branch, 
-                        adjacency, 
-                        forbidden=forbidden_area, 
-                        shuffle=True, 
+                        start_branch,
+                        forbidden=forbidden_area,
+                        shuffle=True,
                         find_dead_end=True
                     )
                     break
-            if not found_key_pos: found_key_pos = segment_nodes[0]
-            kx, ky = found_key_pos[0]*2 + 1, found_key_pos[1]*2 + 1
+            if found_key_pos is None: found_key_pos = segment_nodes[0]
+            kx, ky = self._maze_cell(found_key_pos)
             items.append({'pos': (kx, ky), 'name': f'Ключ {i+1}', 'color': key_colors[i]})
         #======
-        player_start = (real_start[0]*2 + 1, real_start[1]*2 + 1)
-        exit_pos = (real_exit[0]*2 + 1, real_exit[1]*2 + 1)
+        player_start = self._maze_cell(real_start)
+        exit_pos = self._maze_cell(real_exit)
         enemies = []
         for _ in range(GAME_BALANCE['ENEMY_SPAWN_ATTEMPTS_MAZE']):
-            ex, ey = random.randint(1, self.width-2), random.randint(1, self.height-2)
-            if (ex, ey) in self.tiles and self.tiles[(ex, ey)].type == 'floor':
+            ex, ey = self.rng.population.randint(1, self.width-2), self.rng.population.randint(1, self.height-2)
+            if self.tiles.type_at(ex, ey) == 'floor':
                 enemies.append((ex, ey))
         return player_start, exit_pos, items, enemies
         #======
 
-    def _bfs_find_node(self, start_node, adj, forbidden=None, shuffle=False, find_dead_end=False):
-        queue = [start_node]
-        visited = {start_node}
-        if forbidden:
-            visited.update(forbidden)
+    def _maze_cell(self, node):
+        return (node % self.maze_w) * 2 + 1, (node // self.maze_w) * 2 + 1
+
+    def _maze_neighbors(self, node):
+        return self.maze_adj[4 * node:4 * node + self.maze_degree[node]].tolist()
+
+    def _place_maze_walls(self, maze_w, maze_h):
+        types = self.tiles.types
+        w = self.width
+        right = min(2 * maze_w + 1, w)
+        for y in range(min(2 * maze_h + 1, self.height)):
+            row = slice(y * w, y * w + right)
+            types[row] = types[row].translate(VOID_TO_WALL)
+        self.tiles.refresh_all()
+
+    def _bfs_find_node(self, start_node, forbidden=None, shuffle=False, find_dead_end=False):
+        degree = self.maze_degree
+        visited = bytearray(forbidden) if forbidden is not None else bytearray(len(degree))
+        visited[start_node] = 1
+        queue = deque([start_node])
         last_node = start_node
         while queue:
-            curr = queue.pop(0)
+            curr = queue.popleft()
             last_node = curr
-            if find_dead_end and len(adj.get(curr, [])) == 1:
+            if find_dead_end and degree[curr] == 1:
                 return curr
-            neighbors = list(adj.get(curr, []))
+            neighbors = self._maze_neighbors(curr)
             if shuffle:
-                random.shuffle(neighbors)
+                self.rng.layout.shuffle(neighbors)
             for nxt in neighbors:
-                if nxt not in visited:
-                    visited.add(nxt)
+                if not visited[nxt]:
+                    visited[nxt] = 1
                     queue.append(nxt)
-        
         return last_node
 
-    def _tunnel_h(self, x1, x2, y):
-        for x in range(min(x1, x2), max(x1, x2)+1): 
-            self._dig(x, y)
-
-    def _tunnel_v(self, y1, y2, x):
-        for y in range(min(y1, y2), max(y1, y2)+1): 
-            self._dig(x, y)
-
-    def _set_tile_conditional(self, x, y, new_type, target_check='void'):
-        if (x, y) not in self.tiles or self.tiles[(x, y)].type == target_check:
-            self.tiles[(x, y)] = Tile(x, y, new_type)
-
-    def _dig(self, x, y):
-        self._set_tile_conditional(x, y, 'floor', 'void')
-
-    def _place_walls(self):
-        floor_tiles = [pos for pos, t in self.tiles.items() if t.type == 'floor']
-        for x, y in floor_tiles:
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    nx, ny = x+dx, y+dy
-                    self._set_tile_conditional(nx, ny, 'wall', 'void')
-
-    def _place_doors(self):
-        for room in self.rooms:
-            r = room.rect
-            for x in range(r.left + 1, r.right - 1):
-                self._try_set_door(x, r.top - 1, check_horizontal=True)
-                self._try_set_door(x, r.bottom, check_horizontal=True)
-            for y in range(r.top + 1, r.bottom - 1):
-                self._try_set_door(r.left - 1, y, check_horizontal=False)
-                self._try_set_door(r.right, y, check_horizontal=False)
+    def _bfs_path(self, start, end):
+        parent = array('i', [-1]) * len(self.maze_degree)
+        parent[start] = start
+        queue = deque([start])
+        while queue:
+            vertex = queue.popleft()
+            if vertex == end:
+                path = [end]
+                while path[-1] != start:
+                    path.append(parent[path[-1]])
+                path.reverse()
+                return path
+            for neighbor in self._maze_neighbors(vertex):
+                if parent[neighbor] == -1:
+                    parent[neighbor] = vertex
+                    queue.append(neighbor)
+        return []
 
-    def _try_set_door(self, x, y, check_horizontal):
-        if (x, y) not in self.tiles: return
-        if self.tiles[(x, y)].type != 'floor': return
-        left = self.tiles.get((x - 1, y))
-        right = self.tiles.get((x + 1, y))
-        top = self.tiles.get((x, y - 1))
-        bot = self.tiles.get((x, y + 1))
-        if check_horizontal:
-            if left and left.type == 'wall' and right and right.type == 'wall':
-                self.tiles[(x, y)] = Tile(x, y, 'door')
+    def _set_tile(self, pos, type_):
+        if self.layout is not None:
+            self.layout.stairs[pos] = TYPE_IDS[type_]
         else:
-            if top and top.type == 'wall' and bot and bot.type == 'wall':
-                self.tiles[(x, y)] = Tile(x, y, 'door')
+            self.tiles.set_tile(pos[0], pos[1], type_)
 
     def _populate_standard_level(self, p_start, exit_pos):
         enemies, items, chests = [], [], []
         for room in self.rooms:
             if room.rect.collidepoint(p_start) or room.rect.collidepoint(exit_pos): continue
-            if random.random() < GAME_BALANCE['ENEMY_CHANCE']:
-                for _ in range(random.randint(1, GAME_BALANCE['MAX_ENEMIES_PER_ROOM'])):
+            if self.rng.population.random() < GAME_BALANCE['ENEMY_CHANCE']:
+                for _ in range(self.rng.population.randint(1, GAME_BALANCE['MAX_ENEMIES_PER_ROOM'])):
                     ex, ey = self._rand_in_room(room)
                     enemies.append((ex, ey))
-            if random.random() < GAME_BALANCE['GROUND_LOOT_CHANCE']:
+            if self.rng.population.random() < GAME_BALANCE['GROUND_LOOT_CHANCE']:
                 lx, ly = self._rand_in_room(room)
-                items.append({'pos': (lx, ly), 'name': random.choice(LOOT_TABLE[min(3, 1+self.level//3)])})
+                items.append({'pos': (lx, ly), 'name': self.rng.population.choice(LOOT_TABLE[min(3, 1+self.level//3)])})
             chest_count = 0
             if room.type == 'treasure': chest_count = 3
-            elif random.random() < 0.3: chest_count = 1
+            elif self.rng.population.random() < 0.3: chest_count = 1
             for _ in range(chest_count):
                 cx, cy = self._rand_in_room(room)
                 chests.append((cx, cy))
         return items, enemies, chests
 
     def _rand_in_room(self, room):
-        return random.randint(room.rect.left+1, room.rect.right-2), random.randint(room.rect.top+1, room.rect.bottom-2)
-    
-    def _bfs_path(self, start, end, adj):
-        queue = [(start, [start])]
-        visited = {start}
-        while queue:
-            (vertex, path) = queue.pop(0)
-            if vertex == end:
-                return path
-            for neighbor in adj.get(vertex, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, path + [neighbor]))
-        return []
\ No newline at end of file
+        return self.rng.population.randint(room.rect.left+1, room.rect.right-2), self.rng.population.randint(room.rect.top+1, room.rect.bottom-2)
@@ -0,0 +1,56 @@
+class Occupancy:
+    def __init__(self):
+        self.layers = {'enemy': {}, 'chest': {}, 'item': {}}
+        self.blocked = {}
+
+    def rebuild(self, enemies, chests, items):
+        for cells in self.layers.values():
+            cells.clear()
+        self.blocked.clear()
+        for e in enemies: self.add('enemy', e)
+        for c in chests: self.add('chest', c)
+        for i in items: self.add('item', i)
+
+    def add(self, layer, entity):
+        self.layers[layer].setdefault((entity.x, entity.y), []).append(entity)
+        if self.blocks(layer, entity):
+            self.block((entity.x, entity.y))
+
+    def remove(self, layer, entity):
+        cells = self.layers[layer]
+        pos = (entity.x, entity.y)
+        bucket = cells.get(pos)
+        if bucket and entity in bucket:
+            bucket.remove(entity)
+            if not bucket: del cells[pos]
+            if self.blocks(layer, entity):
+                self.unblock(pos)
+
+    def move(self, layer, entity, x, y):
+        self.remove(layer, entity)
+        entity.x, entity.y = x, y
+        self.add(layer, entity)
+
+    def get(self, layer, x, y):
+        bucket = self.layers[layer].get((x, y))
+        return bucket[0] if bucket else None
+
+    def all_at(self, layer, x, y):
+        return list(self.layers[layer].get((x, y), ()))
+
+    def blocks(self, layer, entity):
+        return layer == 'enemy' or (layer == 'chest' and not entity.is_open)
+
+    def block(self, pos):
+        self.blocked[pos] = self.blocked.get(pos, 0) + 1
+
+    def unblock(self, pos):
+        n = self.blocked[pos] - 1
+        if n: self.blocked[pos] = n
+        else: del self.blocked[pos]
+
+    def open_chest(self, chest):
+        if chest.is_open: return
+        chest.is_open = True
+        if chest in self.layers['chest'].get((chest.x, chest.y), ()):
+            self.unblock((chest.x, chest.y))
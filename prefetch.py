@@ -0,0 +1,42 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from settings import *
+from map_generator import generate_level
+
+class LevelPrefetcher:
+    def __init__(self, workers=PREFETCH['WORKERS']):
+        self.workers = workers
+        self.pool = None
+        self.pending = {}
+
+    def request(self, seed, level):
+        if not self.workers or (seed, level) in self.pending: return
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            self.pending[(seed, level)] = self.pool.submit(generate_level, seed, level)
+        except BrokenProcessPool:
+            print("[Prefetch] Worker pool died, generating levels inline")
+            self.pool = None
+            self.workers = 0
+
+    def take(self, seed, level):
+        future = self.pending.pop((seed, level), None)
+        if future is not None and not future.cancelled():
+            try:
+                return future.result()
+            except Exception as e:
+                print(f"[Prefetch] Level {level} failed in background: {e}")
+        return generate_level(seed, level)
+
+    def discard(self, keep=()):
+        for key in list(self.pending):
+            if key not in keep:
+                self.pending.pop(key).cancel()
+
+    def shutdown(self):
+        self.discard()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
@@ -0,0 +1,88 @@
+import pygame, time
+from collections import deque
+from contextlib import contextmanager
+from settings import *
+
+class TrackedFont:
+    def __init__(self, font, profiler):
+        self.font = font
+        self.profiler = profiler
+
+    def render(self, *args):
+        self.profiler.alloc()
+        return self.font.render(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.font, name)
+
+class FrameProfiler:
+    def __init__(self, window=PROFILING['WINDOW']):
+        self.window = window
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.samples = {}
+        self.frame = {}
+        self.nested = 0.0
+        self.allocs = 0
+        self.alloc_samples = deque(maxlen=self.window)
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        outer, self.nested = self.nested, 0.0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.add(name, elapsed - self.nested)
+            self.nested = outer + elapsed
+
+    def add(self, name, seconds):
+        if not self.enabled: return
+        self.frame[name] = self.frame.get(name, 0.0) + seconds
+
+    def alloc(self, n=1):
+        self.allocs += n
+
+    def end_frame(self):
+        if not self.enabled: return
+        for name, seconds in self.frame.items():
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+            self.samples[name].append(seconds * 1000)
+        self.alloc_samples.append(self.allocs)
+        self.frame = {}
+        self.allocs = 0
+
+    def stats(self):
+        rows = []
+        for name in sorted(self.samples, key=self._order):
+            data = sorted(self.samples[name])
+            rows.append((name, sum(data) / len(data), data[int(0.95 * (len(data) - 1))], len(data)))
+        return rows
+
+    def _order(self, name):
+        phases = PROFILING['PHASES']
+        head = name.split('.')[0]
+        return (phases.index(head) if head in phases else len(phases), name)
+
+    def draw(self, screen, font):
+        lines = [f"{'phase':<14}{'avg':>7}{'p95':>7}   n"]
+        for name, avg, p95, n in self.stats():
+            lines.append(f"{name:<14}{avg:7.2f}{p95:7.2f}  {n}")
+        if self.alloc_samples:
+            allocs = self.alloc_samples
+            lines.append(f"surfaces/frame {sum(allocs) / len(allocs):.1f} (max {max(allocs)})")
+        surfs = [font.render(line, True, COLORS['WHITE']) for line in lines]
+        line_h = font.get_linesize()
+        panel_w = max(s.get_width() for s in surfs) + 10
+        x, y = WIDTH - panel_w - 10, 10
+        pygame.draw.rect(screen, COLORS['DEBUG_BG'], (x, y, panel_w, line_h * len(surfs) + 10))
+        screen.blits([(s, (x + 5, y + 5 + line_h * k)) for k, s in enumerate(surfs)], False)
+
+profiler = FrameProfiler()
@@ -0,0 +1,21 @@
+import random
+
+LEVEL_STREAMS = ('layout', 'population', 'combat', 'ai', 'cosmetics')
+
+def new_seed():
+    return random.SystemRandom().randrange(2**32)
+
+class LevelRng:
+    def __init__(self, seed, level):
+        self.seed = seed
+        self.level = level
+        for name in LEVEL_STREAMS:
+            setattr(self, name, random.Random(f"{seed}:{level}:{name}"))
+
+class GameRng:
+    def __init__(self, seed=None):
+        self.seed = new_seed() if seed is None else seed
+        self.runs = random.Random(f"{self.seed}:runs")
+
+    def next_run(self):
+        return GameRng(self.runs.randrange(2**32))
@@ -0,0 +1,51 @@
+import mmap, os, pickle, struct
+
+MAGIC = b'RLSAVE'
+VERSION = 3
+HEADER = struct.Struct('<6sHQ')
+
+def write_run(path, state, levels):
+    blobs = []
+    offset = 0
+    packed = {}
+    for level, record in levels.items():
+        width, height, *arrays = record['tiles']
+        spans = []
+        for data in arrays:
+            if isinstance(data, bytes):
+                spans.append(('blob', offset, len(data)))
+                blobs.append(data)
+                offset += len(data)
+            else:
+                spans.append(('value', data))
+        packed[level] = dict(record, tiles=(width, height, spans))
+    meta = pickle.dumps({'state': state, 'levels': packed}, pickle.HIGHEST_PROTOCOL)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(meta)))
+        f.write(meta)
+        for data in blobs:
+            f.write(data)
+    os.replace(tmp, path)
+
+def read_run(path):
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        try:
+            magic, version, meta_len = HEADER.unpack_from(mm)
+        except struct.error:
+            raise ValueError(f"{path}: truncated header") from None
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a save file")
+        if version != VERSION:
+            raise ValueError(f"{path}: save version {version}, expected {VERSION}")
+        base = HEADER.size + meta_len
+        try:
+            meta = pickle.loads(mm[HEADER.size:base])
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, TypeError, ValueError) as e:
+            raise ValueError(f"{path}: corrupt metadata ({e})") from None
+        for record in meta['levels'].values():
+            width, height, spans = record['tiles']
+            if any(s[0] == 'blob' and base + s[1] + s[2] > len(mm) for s in spans):
+                raise ValueError(f"{path}: truncated tile data")
+            record['tiles'] = (width, height, *(mm[base + s[1]:base + s[1] + s[2]] if s[0] == 'blob' else s[1] for s in spans))
+    return meta['state'], meta['levels']
@@ -0,0 +1,55 @@
+import heapq
+from settings import AI
+
+class TurnScheduler:
+    def __init__(self, ticks=AI['TURN_TICKS']):
+        self.ticks = ticks
+        self.now = 0
+        self.queue = []
+        self.active = {}
+        self.counter = 0
+
+    def reset(self, actors, now=0):
+        self.now = now
+        awake = [actor for actor in actors if actor.state != 'sleep']
+        for actor in awake:
+            if actor.ready_at < now: actor.ready_at = now
+        seqs = range(self.counter + 1, self.counter + len(awake) + 1)
+        self.counter += len(awake)
+        self.active = dict(zip(awake, seqs))
+        self.queue = [(actor.ready_at, seq, actor) for actor, seq in zip(awake, seqs)]
+        heapq.heapify(self.queue)
+
+    def __len__(self):
+        return len(self.active)
+
+    def __contains__(self, actor):
+        return actor in self.active
+
+    def schedule(self, actor, at):
+        at = max(at, self.now)
+        self.counter += 1
+        actor.ready_at = at
+        self.active[actor] = self.counter
+        heapq.heappush(self.queue, (at, self.counter, actor))
+
+    def wake(self, actor):
+        if actor not in self.active:
+            self.schedule(actor, actor.ready_at)
+
+    def remove(self, actor):
+        self.active.pop(actor, None)
+
+    def advance(self, act):
+        end = self.now + self.ticks
+        queue, active = self.queue, self.active
+        while queue and queue[0][0] < end:
+            at, seq, actor = heapq.heappop(queue)
+            if active.get(actor) != seq: continue
+            self.now = at
+            delay = act(actor)
+            if delay is None:
+                active.pop(actor, None)
+            elif active.get(actor) == seq:
+                self.schedule(actor, at + delay)
+        self.now = end
@@ -6,6 +6,7 @@ TITLE = "Roguelike RPG"
 
 TILE_SIZE = 32
 FOV_RADIUS = 10
+FOV_ENGINE = 'table'
 MIN_ZOOM = 0.5
 MAX_ZOOM = 2.0
 
@@ -21,7 +22,16 @@ COLORS = {
     'GAME_OVER_BORDER': (150, 0, 0),
     'GAME_OVER_TEXT': (200, 0, 0),
     'UI_TEXT_DIM': (200, 200, 200),
-    'DEBUG_BG': (0, 0, 0, 180)
+    'DEBUG_BG': (0, 0, 0, 180),
+    'FOG_ALPHA': 150
+}
+
+KEY_COLORS = {
+    'key_0': (205, 127, 50),
+    'key_1': (192, 192, 192),
+    'key_2': (255, 215, 0),
+    'key_3': (0, 255, 255),
+    'key_4': (255, 0, 255)
 }
 
 UI_SETTINGS = {
@@ -33,6 +43,29 @@ UI_SETTINGS = {
     'OFFSET_X': 50
 }
 
+RENDER = {
+    'CHUNK_TILES': 16,
+    'MAX_CHUNKS': 128
+}
+
+LEVEL_CACHE = {
+    'MEMORY_LEVELS': 3
+}
+
+SAVE = {
+    'AUTOSAVE': 'autosave.sav',
+    'QUICKSAVE': 'quicksave.sav'
+}
+
+PREFETCH = {
+    'WORKERS': 1
+}
+
+PROFILING = {
+    'WINDOW': 120,
+    'PHASES': ('events', 'update_fov', 'ai', 'terrain', 'entities', 'hud', 'flip')
+}
+
 MAP_GEN = {
     'SECT_WIDTH': 10,
     'SECT_HEIGHT': 10,
@@ -41,7 +74,9 @@ MAP_GEN = {
     'TUNNEL_RANDOMNESS': 0.5,
     'MIN_ROOM_SIZE': 4,
     'MAX_KEYS': 5,
-    'MIN_KEYS': 3
+    'MIN_KEYS': 3,
+    'CHUNK_TILES': 32,
+    'LAZY_MIN_AREA': 128 * 128
 }
 
 BIOMES = {
@@ -88,6 +123,16 @@ ENEMIES_DB = {
     'mimic': {'name': 'Мімік', 'sprite': 'mimic', 'base_hp': 30, 'base_dmg': 8, 'moves': 1, 'attacks': 1, 'vision': 10, 'patrol_chance': 0.0}
 }
 
+AI = {
+    'FLOW_FIELD_RADIUS': 32,
+    'PATH_CACHE_SIZE': 512,
+    'PATH_REGION_SIZE': 8,
+    'TURN_TICKS': 12,
+    'NOISE_RADIUS': 5,
+    'BATCH_MIN_ENEMIES': 200,
+    'BATCH_FIELDS': 32
+}
+
 ENEMY_SPAWN_RULES = [
     (1, ['rat']),
     (3, ['rat', 'goblin']),
@@ -0,0 +1,26 @@
+import pygame
+from profiler import profiler
+
+class SpriteCache:
+    def __init__(self, assets):
+        self.assets = assets
+        self.zoom = None
+        self.cache = {}
+
+    def sync(self, zoom):
+        if zoom != self.zoom:
+            self.cache.clear()
+            self.zoom = zoom
+
+    def get(self, key, size, tint=None):
+        cache_key = (key, tint, size)
+        img = self.cache.get(cache_key)
+        if img is None:
+            img = self.assets[key]
+            if tint:
+                img = img.copy()
+                img.fill(tint, special_flags=pygame.BLEND_RGBA_MULT)
+            img = pygame.transform.scale(img, size)
+            profiler.alloc(2 if tint else 1)
+            self.cache[cache_key] = img
+        return img
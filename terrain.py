@@ -0,0 +1,104 @@
+import pygame
+from settings import *
+from profiler import profiler
+from tile_grid import FLOOR, WALL, DOOR, STAIRS_UP, STAIRS_DOWN
+
+FLOOR_KEYS = ('floor', 'floor_dec_1', 'floor_dec_2')
+WALL_KEYS = ('wall_1', 'wall_2', 'wall_3')
+
+class TerrainLayer:
+    def __init__(self, sprites):
+        self.sprites = sprites
+        self.chunk_tiles = RENDER['CHUNK_TILES']
+        self.chunks = {}
+        self.grid = None
+        self.state = None
+        self.hidden = set()
+
+    def sync(self, grid, biome, zoom, reveal_all):
+        state = (biome['bg'], biome['floor_tint'], biome['wall_tint'], zoom, reveal_all)
+        if grid is not self.grid or state != self.state:
+            self.grid = grid
+            self.state = state
+            self.biome = biome
+            self.reveal_all = reveal_all
+            self.scale = TILE_SIZE * zoom
+            self.tile_size = int(self.scale)
+            self.chunks.clear()
+            grid.dirty.clear()
+            return
+        if grid.dirty:
+            ct = self.chunk_tiles
+            w = grid.width
+            for i in grid.dirty:
+                self.chunks.pop(((i % w) // ct, (i // w) // ct), None)
+            grid.dirty.clear()
+
+    def set_hidden(self, cells):
+        changed = cells ^ self.hidden
+        if changed:
+            ct = self.chunk_tiles
+            for x, y in changed:
+                self.chunks.pop((x // ct, y // ct), None)
+            self.hidden = cells
+
+    def draw(self, screen, camera):
+        ct = self.chunk_tiles
+        s = self.scale
+        ox, oy = int(camera.scroll.x), int(camera.scroll.y)
+        x0, y0, x1, y1 = camera.visible_tile_range(self.grid.width, self.grid.height)
+        batch = []
+        shown = set()
+        for cy in range(y0 // ct, (y1 - 1) // ct + 1):
+            for cx in range(x0 // ct, (x1 - 1) // ct + 1):
+                surf = self.chunks.get((cx, cy))
+                if surf is None:
+                    surf = self._render_chunk(cx, cy)
+                    self.chunks[(cx, cy)] = surf
+                shown.add((cx, cy))
+                batch.append((surf, (int(cx * ct * s) + ox, int(cy * ct * s) + oy)))
+        screen.blits(batch, False)
+        if len(self.chunks) > RENDER['MAX_CHUNKS']:
+            for key in [k for k in self.chunks if k not in shown][:len(self.chunks) - RENDER['MAX_CHUNKS']]:
+                del self.chunks[key]
+
+    def _render_chunk(self, cx, cy):
+        grid = self.grid
+        ct = self.chunk_tiles
+        s = self.scale
+        size = self.tile_size
+        x0, y0 = cx * ct, cy * ct
+        x1, y1 = min(x0 + ct, grid.width), min(y0 + ct, grid.height)
+        px0, py0 = int(x0 * s), int(y0 * s)
+        surf = pygame.Surface((int(x1 * s) - px0, int(y1 * s) - py0)).convert()
+        profiler.alloc(2)
+        surf.fill(self.biome['bg'])
+        tile_dims = (size, size)
+        floor_tint = self.biome['floor_tint']
+        wall_tint = self.biome['wall_tint']
+        get = self.sprites.get
+        w = grid.width
+        types, variant, explored = grid.types, grid.variant, grid.explored
+        floors, overlays = [], []
+        for y in range(y0, y1):
+            py = int(y * s) - py0
+            for x in range(x0, x1):
+                i = y * w + x
+                if not explored[i] and not self.reveal_all: continue
+                t = types[i]
+                pos = (int(x * s) - px0, py)
+                if t in (FLOOR, DOOR, STAIRS_DOWN, STAIRS_UP):
+                    floors.append((get(FLOOR_KEYS[variant[i]], tile_dims, floor_tint), pos))
+                if t == WALL:
+                    overlays.append((get(WALL_KEYS[variant[i] % 3], tile_dims, wall_tint), pos))
+                elif (x, y) in self.hidden:
+                    pass
+                elif t == DOOR:
+                    overlays.append((get('door_open' if grid.is_open[i] else 'door_closed', tile_dims), pos))
+                elif t == STAIRS_DOWN:
+                    overlays.append((get('stairs_down', tile_dims), pos))
+                elif t == STAIRS_UP:
+                    overlays.append((get('stairs_up', tile_dims), pos))
+        surf.blits(floors, False)
+        surf.blits(overlays, False)
+        return surf
@@ -0,0 +1,309 @@
+from array import array
+from settings import AI, MAP_GEN
+
+TILE_TYPES = ('void', 'floor', 'wall', 'door', 'stairs_up', 'stairs_down')
+TYPE_IDS = {name: i for i, name in enumerate(TILE_TYPES)}
+VOID, FLOOR, WALL, DOOR, STAIRS_UP, STAIRS_DOWN = range(len(TILE_TYPES))
+WALL_MASK = bytes(1 if t == WALL else 0 for t in range(256))
+OPEN_MASK = bytes(0 if t == WALL else 1 for t in range(256))
+VOID_TO_WALL = bytes(WALL if t == VOID else t for t in range(256))
+MOD_3 = bytes(t % 3 for t in range(256))
+
+def pack_bits(flags):
+    padded = bytes(flags) + bytes(-len(flags) % 8)
+    bits = 0
+    for k in range(8):
+        bits |= int.from_bytes(padded[k::8], 'little') << k
+    return bits.to_bytes(len(padded) // 8, 'little')
+
+def unpack_bits(bits, n):
+    value = int.from_bytes(bits, 'little')
+    ones = int.from_bytes(b'\x01' * len(bits), 'little')
+    flags = bytearray(len(bits) * 8)
+    for k in range(8):
+        flags[k::8] = ((value >> k) & ones).to_bytes(len(bits), 'little')
+    return flags[:n]
+
+class Tile:
+    __slots__ = ('grid', 'x', 'y', 'i')
+
+    def __init__(self, grid, x, y):
+        self.grid = grid
+        self.x, self.y = x, y
+        self.i = y * grid.width + x
+
+    @property
+    def type(self):
+        return TILE_TYPES[self.grid.types[self.i]]
+
+    @type.setter
+    def type(self, val):
+        self.grid.types[self.i] = TYPE_IDS[val]
+        self.grid.touch(self.i)
+
+    @property
+    def variant(self):
+        return self.grid.variant[self.i]
+
+    @variant.setter
+    def variant(self, val):
+        self.grid.variant[self.i] = val
+
+    @property
+    def visible(self):
+        return bool(self.grid.visible[self.i])
+
+    @visible.setter
+    def visible(self, val):
+        self.grid.visible[self.i] = 1 if val else 0
+        self.grid.vis_dirty.add(self.i)
+
+    @property
+    def explored(self):
+        return bool(self.grid.explored[self.i])
+
+    @explored.setter
+    def explored(self, val):
+        self.grid.explored[self.i] = 1 if val else 0
+        self.grid.dirty.add(self.i)
+        self.grid.vis_dirty.add(self.i)
+
+    @property
+    def is_open(self):
+        return bool(self.grid.is_open[self.i])
+
+    @is_open.setter
+    def is_open(self, val):
+        self.grid.is_open[self.i] = 1 if val else 0
+        self.grid.touch(self.i)
+
+    @property
+    def locked(self):
+        return bool(self.grid.locked[self.i])
+
+    @locked.setter
+    def locked(self, val):
+        self.grid.locked[self.i] = 1 if val else 0
+        self.grid.touch(self.i)
+
+    @property
+    def key_color(self):
+        n = self.grid.key_color[self.i]
+        return f'key_{n - 1}' if n else None
+
+    @key_color.setter
+    def key_color(self, val):
+        self.grid.key_color[self.i] = int(val.split('_')[1]) + 1 if val else 0
+
+    @property
+    def blocked(self):
+        return bool(self.grid.opaque[self.i])
+
+    @blocked.setter
+    def blocked(self, val):
+        if self.grid.types[self.i] == DOOR:
+            self.is_open = not val
+
+    @property
+    def block_sight(self):
+        return bool(self.grid.opaque[self.i])
+
+    @block_sight.setter
+    def block_sight(self, val):
+        if self.grid.types[self.i] == DOOR:
+            self.is_open = not val
+
+class TileGrid:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        size = width * height
+        self.types = bytearray(size)
+        self.variant = bytearray(size)
+        self.is_open = bytearray(size)
+        self.locked = bytearray(size)
+        self.visible = bytearray(size)
+        self.explored = bytearray(size)
+        self.key_color = bytearray(size)
+        self.opaque = bytearray(size)
+        self.passable = bytearray(b'\x01') * size
+        self.dirty = set()
+        self.passable_version = 0
+        self.region_size = AI['PATH_REGION_SIZE']
+        self.region_cols = (width + self.region_size - 1) // self.region_size
+        region_rows = (height + self.region_size - 1) // self.region_size
+        self.region_version = array('I', [0]) * (self.region_cols * region_rows)
+        self.vis_dirty = set()
+        self.chunk_tiles = MAP_GEN['CHUNK_TILES']
+        self.chunk_cols = (width + self.chunk_tiles - 1) // self.chunk_tiles
+        self.chunk_rows = (height + self.chunk_tiles - 1) // self.chunk_tiles
+        self.source = None
+        self.ready = None
+        self.pending = 0
+
+    def make_lazy(self, source, ready=None):
+        self.source = source
+        self.ready = ready if ready is not None else bytearray(self.chunk_cols * self.chunk_rows)
+        self.pending = self.ready.count(0)
+        if not self.pending:
+            self.source = None
+
+    def ensure(self, x0, y0, x1, y1):
+        if self.source is None: return
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.width), min(y1, self.height)
+        if x0 >= x1 or y0 >= y1: return
+        ct = self.chunk_tiles
+        for cy in range(y0 // ct, (y1 - 1) // ct + 1):
+            for cx in range(x0 // ct, (x1 - 1) // ct + 1):
+                if not self.ready[cy * self.chunk_cols + cx]:
+                    self._materialize(cx, cy)
+                    if self.source is None: return
+
+    def ensure_cell(self, x, y):
+        if self.source is None or not (0 <= x < self.width and 0 <= y < self.height): return
+        ct = self.chunk_tiles
+        if not self.ready[(y // ct) * self.chunk_cols + x // ct]:
+            self._materialize(x // ct, y // ct)
+
+    def ensure_all(self):
+        self.ensure(0, 0, self.width, self.height)
+
+    def _materialize(self, cx, cy):
+        ct = self.chunk_tiles
+        x0, y0 = cx * ct, cy * ct
+        x1, y1 = min(x0 + ct, self.width), min(y0 + ct, self.height)
+        self.source.materialize(self, x0, y0, x1, y1)
+        self.refresh_area(x0, y0, x1, y1)
+        w = self.width
+        for y in range(y0, y1):
+            self.dirty.update(range(y * w + x0, y * w + x1))
+        self.ready[cy * self.chunk_cols + cx] = 1
+        self.pending -= 1
+        if not self.pending:
+            self.source = None
+
+    def pack(self):
+        lazy = (pack_bits(self.ready), self.source) if self.source is not None else None
+        return (self.width, self.height, bytes(self.types), bytes(self.variant),
+                bytes(self.is_open), bytes(self.locked), bytes(self.key_color), pack_bits(self.explored), lazy)
+
+    @classmethod
+    def unpack(cls, data):
+        width, height, types, variant, is_open, locked, key_color, explored, lazy = data
+        grid = cls(width, height)
+        grid.types[:] = types
+        grid.variant[:] = variant
+        grid.is_open[:] = is_open
+        grid.locked[:] = locked
+        grid.key_color[:] = key_color
+        grid.explored[:] = unpack_bits(explored, len(grid))
+        grid.refresh_all()
+        if lazy is not None:
+            ready, source = lazy
+            grid.make_lazy(source, unpack_bits(ready, grid.chunk_cols * grid.chunk_rows))
+        return grid
+
+    def __len__(self):
+        return self.width * self.height
+
+    def __contains__(self, pos):
+        x, y = pos
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def __getitem__(self, pos):
+        x, y = pos
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise KeyError(pos)
+        self.ensure_cell(x, y)
+        return Tile(self, x, y)
+
+    def __iter__(self):
+        for y in range(self.height):
+            for x in range(self.width):
+                yield (x, y)
+
+    def get(self, pos, default=None):
+        if pos not in self: return default
+        self.ensure_cell(pos[0], pos[1])
+        return Tile(self, pos[0], pos[1])
+
+    def items(self):
+        for pos in self:
+            yield pos, Tile(self, pos[0], pos[1])
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def set_tile(self, x, y, type_):
+        if not (0 <= x < self.width and 0 <= y < self.height): return
+        i = y * self.width + x
+        self.types[i] = TYPE_IDS[type_]
+        self.is_open[i] = 0
+        self.locked[i] = 0
+        self.key_color[i] = 0
+        self.refresh(i)
+
+    def roll_variants(self, rng):
+        n = len(self.variant)
+        rolls = b''
+        while len(rolls) < n:
+            rolls += rng.randbytes(n - len(rolls)).replace(b'\xff', b'')
+        self.variant[:] = rolls[:n].translate(MOD_3)
+
+    def type_at(self, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height): return None
+        self.ensure_cell(x, y)
+        return TILE_TYPES[self.types[y * self.width + x]]
+
+    def refresh(self, i):
+        t = self.types[i]
+        closed_door = t == DOOR and not self.is_open[i]
+        self.opaque[i] = 1 if t == WALL or closed_door else 0
+        passable = 0 if t == WALL or (closed_door and self.locked[i]) else 1
+        if passable != self.passable[i]:
+            self.passable[i] = passable
+            self.passable_version += 1
+
+    def refresh_all(self):
+        self.refresh_area(0, 0, self.width, self.height)
+
+    def refresh_area(self, x0, y0, x1, y1):
+        w = self.width
+        if x0 == 0 and x1 == w:
+            spans = [(y0 * w, y1 * w)]
+        else:
+            spans = [(y * w + x0, y * w + x1) for y in range(y0, y1)]
+        types = self.types
+        self.passable_version += 1
+        for a, b in spans:
+            self.opaque[a:b] = types[a:b].translate(WALL_MASK)
+            self.passable[a:b] = types[a:b].translate(OPEN_MASK)
+            i = types.find(DOOR, a, b)
+            while i != -1:
+                self.refresh(i)
+                i = types.find(DOOR, i + 1, b)
+
+    def touch(self, i):
+        self.refresh(i)
+        self.dirty.add(i)
+        self.bump_region(i % self.width, i // self.width)
+
+    def region_of(self, x, y):
+        return (y // self.region_size) * self.region_cols + x // self.region_size
+
+    def regions_in(self, x0, y0, x1, y1):
+        rs = self.region_size
+        return [ry * self.region_cols + rx for ry in range(y0 // rs, y1 // rs + 1) for rx in range(x0 // rs, x1 // rs + 1)]
+
+    def bump_region(self, x, y):
+        self.region_version[self.region_of(x, y)] += 1
+
+    def clear_visible(self):
+        self.visible[:] = bytes(len(self.visible))
+
+    def cells_of(self, type_):
+        self.ensure_all()
+        t = TYPE_IDS[type_]
+        w = self.width
+        return [(i % w, i // w) for i, v in enumerate(self.types) if v == t]
@@ -1,5 +1,7 @@
 import pygame
 import heapq
+from array import array
+from collections import OrderedDict, deque
 from settings import *
 
 class Camera:
@@ -36,25 +38,45 @@ class Camera:
         screen_y = rect.y * self.zoom + self.scroll.y
         return pygame.Rect(screen_x, screen_y, rect.width * self.zoom, rect.height * self.zoom)
 
+    def tile_size(self):
+        size = int(TILE_SIZE * self.zoom)
+        return (size, size)
+
+    def tile_to_screen(self, x, y):
+        s = TILE_SIZE * self.zoom
+        return (int(x * s + self.scroll.x), int(y * s + self.scroll.y))
+
+    def visible_tile_range(self, map_w, map_h):
+        s = TILE_SIZE * self.zoom
+        x0 = max(0, int(-self.scroll.x // s))
+        y0 = max(0, int(-self.scroll.y // s))
+        x1 = min(map_w, int((self.width - self.scroll.x) // s) + 1)
+        y1 = min(map_h, int((self.height - self.scroll.y) // s) + 1)
+        return x0, y0, x1, y1
+
     def center_on(self, target_x, target_y):
         self.scroll.x = WIDTH // 2 - (target_x * TILE_SIZE * self.zoom) - (TILE_SIZE * self.zoom // 2)
         self.scroll.y = HEIGHT // 2 - (target_y * TILE_SIZE * self.zoom) - (TILE_SIZE * self.zoom // 2)
 
-def compute_fov(origin_x, origin_y, radius, map_data):
+FOV_OCTANTS = [
+    (1, 0, 0, 1), (1, 0, 0, -1), (-1, 0, 0, 1), (-1, 0, 0, -1),
+    (0, 1, 1, 0), (0, 1, -1, 0), (0, -1, 1, 0), (0, -1, -1, 0)
+]
+
+def compute_fov(origin_x, origin_y, radius, grid):
+    grid.ensure(origin_x - radius, origin_y - radius, origin_x + radius + 1, origin_y + radius + 1)
     visible = set()
     visible.add((origin_x, origin_y))
-    multipliers = [
-        (1, 0, 0, 1), (1, 0, 0, -1), (-1, 0, 0, 1), (-1, 0, 0, -1),
-        (0, 1, 1, 0), (0, 1, -1, 0), (0, -1, 1, 0), (0, -1, -1, 0)
-    ]
-    for xx, xy, yx, yy in multipliers:
-        _cast_light(origin_x, origin_y, radius, 1, 1.0, 0.0, xx, xy, yx, yy, map_data, visible)
+    for xx, xy, yx, yy in FOV_OCTANTS:
+        _cast_light(origin_x, origin_y, radius, 1, 1.0, 0.0, xx, xy, yx, yy, grid, visible)
     return visible
 
-def _cast_light(cx, cy, radius, row, start_slope, end_slope, xx, xy, yx, yy, map_data, visible):
+def _cast_light(cx, cy, radius, row, start_slope, end_slope, xx, xy, yx, yy, grid, visible):
     if start_slope < end_slope:
         return
     radius_sq = radius * radius
+    w, h = grid.width, grid.height
+    opaque = grid.opaque
     for j in range(row, radius + 1):
         dx = -j - 1
         dy = -j
@@ -68,13 +90,10 @@ def _cast_light(cx, cy, radius, row, start_slope, end_slope, xx, xy, yx, yy, map
                 continue
             if end_slope > l_slope:
                 break
-            if dx*dx + dy*dy <= radius_sq:
+            in_map = 0 <= X < w and 0 <= Y < h
+            if in_map and dx*dx + dy*dy <= radius_sq:
                 visible.add((X, Y))
-            is_blocked = False
-            if (X, Y) not in map_data:
-                is_blocked = True
-            elif map_data[(X, Y)].block_sight:
-                is_blocked = True
+            is_blocked = not in_map or opaque[Y * w + X]
             if blocked:
                 if is_blocked:
                     new_start = r_slope
@@ -85,16 +104,77 @@ def _cast_light(cx, cy, radius, row, start_slope, end_slope, xx, xy, yx, yy, map
             else:
                 if is_blocked and j < radius:
                     blocked = True
-                    _cast_light(cx, cy, radius, j + 1, start_slope, l_slope, xx, xy, yx, yy, map_data, visible)
+                    _cast_light(cx, cy, radius, j + 1, start_slope, l_slope, xx, xy, yx, yy, grid, visible)
                     new_start = r_slope
         if blocked:
             break
 
-def get_path(start, goal, map_data, blocking_entities=None):
-    if goal not in map_data:
+_FOV_TABLES = {}
+
+def _fov_table(radius):
+    table = _FOV_TABLES.get(radius)
+    if table is None:
+        radius_sq = radius * radius
+        rows = []
+        for j in range(1, radius + 1):
+            dy = -j
+            rows.append([(dx, dy, (dx - 0.5) / (dy + 0.5), (dx + 0.5) / (dy - 0.5), dx*dx + dy*dy <= radius_sq) for dx in range(-j, 1)])
+        table = []
+        for xx, xy, yx, yy in FOV_OCTANTS:
+            table.append([[(dx * xx + dy * xy, dx * yx + dy * yy, l_slope, r_slope, lit) for dx, dy, l_slope, r_slope, lit in row] for row in rows])
+        _FOV_TABLES[radius] = table
+    return table
+
+def compute_fov_table(origin_x, origin_y, radius, grid):
+    grid.ensure(origin_x - radius, origin_y - radius, origin_x + radius + 1, origin_y + radius + 1)
+    visible = set()
+    visible.add((origin_x, origin_y))
+    w, h = grid.width, grid.height
+    opaque = grid.opaque
+    for rows in _fov_table(radius):
+        stack = [(1, 1.0, 0.0)]
+        while stack:
+            row, start_slope, end_slope = stack.pop()
+            if start_slope < end_slope: continue
+            for j in range(row, radius + 1):
+                blocked = False
+                for ox, oy, l_slope, r_slope, lit in rows[j - 1]:
+                    if start_slope < r_slope:
+                        continue
+                    if end_slope > l_slope:
+                        break
+                    X, Y = origin_x + ox, origin_y + oy
+                    in_map = 0 <= X < w and 0 <= Y < h
+                    if in_map and lit:
+                        visible.add((X, Y))
+                    is_blocked = not in_map or opaque[Y * w + X]
+                    if blocked:
+                        if is_blocked:
+                            new_start = r_slope
+                            continue
+                        else:
+                            blocked = False
+                            start_slope = new_start
+                    else:
+                        if is_blocked and j < radius:
+                            blocked = True
+                            stack.append((j + 1, start_slope, l_slope))
+                            new_start = r_slope
+                if blocked:
+                    break
+    return visible
+
+FOV_ENGINES = {'recursive': compute_fov, 'table': compute_fov_table}
+
+def get_path(start, goal, grid, blocking_entities=None, ignore=None):
+    if goal not in grid:
         return []
     if blocking_entities is None:
         blocking_entities = set()
+    w, h = grid.width, grid.height
+    passable = grid.passable
+    lazy = grid.source is not None
+    ready, ct, cols = grid.ready, grid.chunk_tiles, grid.chunk_cols
     frontier = []
     heapq.heappush(frontier, (0, start))
     came_from = {start: None}
@@ -105,15 +185,12 @@ def get_path(start, goal, map_data, blocking_entities=None):
             break
         cx, cy = current
         for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            next_node = (cx + dx, cy + dy)
-            if next_node in map_data:
-                tile = map_data[next_node]
-                is_walkable = not tile.blocked
-                if tile.type == 'door' and not tile.locked:
-                    is_walkable = True
-                if tile.type == 'wall':
-                    is_walkable = False
-                if next_node in blocking_entities and next_node != goal:
+            nx, ny = cx + dx, cy + dy
+            if 0 <= nx < w and 0 <= ny < h:
+                next_node = (nx, ny)
+                if lazy and not ready[(ny // ct) * cols + nx // ct]: grid.ensure_cell(nx, ny)
+                is_walkable = passable[ny * w + nx]
+                if next_node in blocking_entities and next_node != goal and next_node != ignore:
                     is_walkable = False
                 if is_walkable:
                     new_cost = cost_so_far[current] + 1
@@ -132,31 +209,182 @@ def get_path(start, goal, map_data, blocking_entities=None):
     path.reverse()
     return path
 
-def has_line_of_sight(x1, y1, x2, y2, map_data):
-    points = []
-    dx = abs(x2 - x1)
-    dy = abs(y2 - y1)
-    x, y = x1, y1
-    sx = -1 if x1 > x2 else 1
-    sy = -1 if y1 > y2 else 1
-    if dx > dy:
-        err = dx / 2.0
-        while x != x2:
-            if (x, y) in map_data and map_data[(x, y)].block_sight: return False
-            points.append((x, y))
-            err -= dy
-            if err < 0:
-                y += sy
-                err += dx
-            x += sx
-    else:
-        err = dy / 2.0
-        while y != y2:
-            if (x, y) in map_data and map_data[(x, y)].block_sight: return False
-            points.append((x, y))
-            err -= dx
-            if err < 0:
-                x += sx
-                err += dy
-            y += sy
-    return True
\ No newline at end of file
+class DistanceField:
+    def __init__(self, grid, max_dist):
+        self.grid = grid
+        self.max_dist = max_dist
+        self.dist = array('i', [-1]) * len(grid)
+        self.touched = []
+        self.key = None
+
+    def update(self, origin):
+        key = (origin, self.grid.passable_version)
+        if key == self.key: return
+        self.key = key
+        dist = self.dist
+        for i in self.touched:
+            dist[i] = -1
+        r = self.max_dist
+        self.grid.ensure(origin[0] - r, origin[1] - r, origin[0] + r + 1, origin[1] + r + 1)
+        w, h = self.grid.width, self.grid.height
+        passable = self.grid.passable
+        start = origin[1] * w + origin[0]
+        dist[start] = 0
+        touched = [start]
+        queue = deque(touched)
+        while queue:
+            i = queue.popleft()
+            d = dist[i] + 1
+            if d > self.max_dist: continue
+            x = i % w
+            for n, ok in ((i + w, i + w < w * h), (i - w, i >= w), (i + 1, x + 1 < w), (i - 1, x > 0)):
+                if ok and dist[n] < 0 and passable[n]:
+                    dist[n] = d
+                    touched.append(n)
+                    queue.append(n)
+        self.touched = touched
+
+    def downhill(self, x, y):
+        w = self.grid.width
+        here = self.dist[y * w + x]
+        if here < 0: return None
+        steps = []
+        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+            nx, ny = x + dx, y + dy
+            if (nx, ny) in self.grid:
+                d = self.dist[ny * w + nx]
+                if 0 <= d < here:
+                    steps.append((d, nx, ny))
+        steps.sort(key=lambda s: s[0])
+        return [(nx, ny) for _, nx, ny in steps]
+
+class PathCache:
+    def __init__(self, grid, capacity):
+        self.grid = grid
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_path(self, start, goal, blocking_entities=None, ignore=None):
+        key = (start, goal)
+        versions = self.grid.region_version
+        entry = self.entries.get(key)
+        if entry:
+            path, regions, stamp = entry
+            if stamp == tuple(versions[r] for r in regions) and not (blocking_entities and any(step in blocking_entities and step != ignore for step in path[:-1])):
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return list(path)
+            del self.entries[key]
+        self.misses += 1
+        path = get_path(start, goal, self.grid, blocking_entities, ignore)
+        if path:
+            xs = [start[0]] + [p[0] for p in path]
+            ys = [start[1]] + [p[1] for p in path]
+            regions = self.grid.regions_in(min(xs), min(ys), max(xs), max(ys))
+            self.entries[key] = (tuple(path), regions, tuple(versions[r] for r in regions))
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return path
+
+class PatrolIndex:
+    def __init__(self, grid, rooms):
+        self.grid = grid
+        self.room_centers = [r.center for r in rooms if r.type != 'start']
+        self.floors = None
+        self.labels = None
+        self.parent = None
+        self.passable = None
+        self.key = None
+        if grid.source is None:
+            self._update()
+
+    def floor_cells(self):
+        if self.floors is None:
+            self.floors = self.grid.cells_of('floor')
+        return self.floors
+
+    def component(self, x, y):
+        if self.key != self.grid.passable_version:
+            self._update()
+        label = self.labels[y * self.grid.width + x]
+        return self._find(label) if label >= 0 else -1
+
+    def connected(self, a, b):
+        if self.grid.source is not None:
+            return True
+        label = self.component(a[0], a[1])
+        return label >= 0 and label == self.component(b[0], b[1])
+
+    def _find(self, label):
+        parent = self.parent
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    def _union(self, a, b):
+        a, b = self._find(a), self._find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+    def _update(self):
+        grid = self.grid
+        passable = bytes(grid.passable)
+        self.key = grid.passable_version
+        old, self.passable = self.passable, passable
+        if old is None:
+            self._label()
+            return
+        n = len(passable)
+        diff = (int.from_bytes(old, 'little') ^ int.from_bytes(passable, 'little')).to_bytes(n, 'little')
+        opened = []
+        i = diff.find(1)
+        while i != -1:
+            if not passable[i]:
+                self._label()
+                return
+            opened.append(i)
+            i = diff.find(1, i + 1)
+        self._join(opened)
+
+    def _join(self, cells):
+        w, size = self.grid.width, len(self.passable)
+        labels, parent = self.labels, self.parent
+        for i in cells:
+            labels[i] = len(parent)
+            parent.append(labels[i])
+        for i in cells:
+            x = i % w
+            for n, ok in ((i + w, i + w < size), (i - w, i >= w), (i + 1, x + 1 < w), (i - 1, x > 0)):
+                if ok and self.passable[n]:
+                    self._union(labels[i], labels[n])
+
+    def _label(self):
+        w, h = self.grid.width, self.grid.height
+        passable = self.passable
+        labels = array('i', [-1]) * (w * h)
+        self.parent = []
+        prev = []
+        for y in range(h):
+            start, stop = y * w, y * w + w
+            row = []
+            a = passable.find(1, start, stop)
+            while a != -1:
+                b = passable.find(0, a, stop)
+                if b == -1: b = stop
+                label = len(self.parent)
+                self.parent.append(label)
+                labels[a:b] = array('i', [label]) * (b - a)
+                row.append((a - start, b - start, label))
+                a = passable.find(1, b, stop)
+            j = 0
+            for a, b, label in row:
+                while j < len(prev) and prev[j][1] <= a: j += 1
+                k = j
+                while k < len(prev) and prev[k][0] < b:
+                    self._union(label, prev[k][2])
+                    k += 1
+            prev = row
+        self.labels = labels